@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Render-path benchmarks for termclock.
+
+Drives TerminalClock against a simulated clock and the headless backend,
+pacing frames the way run() does, and reports per-frame latency,
+allocation and terminal cell counts for every font, time format,
+animation and info panel combination.
+
+    python3 benchmarks/bench_render.py --output results.json
+    python3 benchmarks/bench_render.py --compare results.json
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import itertools
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import termclock  # noqa: E402
+
+# Simulated start time, a few seconds before minute and hour carries
+START_TIME = datetime(2024, 1, 1, 12, 59, 45).timestamp()
+
+
+class FakeClock:
+    """Simulated wall clock that only moves when told to"""
+
+    def __init__(self, start):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+
+class FakeSampler:
+    """Stands in for SystemSampler with a snapshot that changes each second"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.items = termclock.info_items(termclock.INFO_ITEMS)
+        self._snapshot = None
+        self._second = None
+        self._history = {name: termclock.MetricHistory(termclock.SystemSampler.HISTORY, 100.0)
+                         for name in ('cpu', 'ram')}
+        self._history.update((name, termclock.MetricHistory(termclock.SystemSampler.HISTORY))
+                             for name in ('disk', 'net rx', 'net tx'))
+
+    def snapshot(self):
+        second = int(self.clock.now)
+        if second != self._second:
+            self._second = second
+            cpu = float(second % 100)
+            rate = float(second % 7) * 1024 * 1024
+            for name, value in (('cpu', cpu), ('ram', 42.0), ('disk', rate), ('net rx', rate), ('net tx', rate / 4)):
+                self._history[name].append(value)
+            self._snapshot = termclock.SystemSnapshot(
+                cpu=cpu,
+                cores=(cpu, 100.0 - cpu, 12.5, 50.0),
+                ram=42.0,
+                disk={'disk': 63},
+                io={'disk': rate},
+                battery=(80, True),
+                network={'net': (rate, rate / 4)},
+                history={name: history.text for name, history in self._history.items()},
+                cost={},
+                errors={},
+                error=None
+            )
+        return self._snapshot
+
+    def stop(self):
+        pass
+
+
+class BenchClock(termclock.TerminalClock):
+    """TerminalClock reading simulated time and a fake sampler"""
+
+    def __init__(self, clock):
+        super().__init__(termclock.TimeSource(wall=clock.time))
+        self.fake_clock = clock
+
+    def start_sampler(self):
+        if self.sampler is None:
+            self.sampler = FakeSampler(self.fake_clock)
+
+
+def frames(clock, seconds):
+    """Yield once per frame that run() would draw over the simulated span"""
+    end = clock.fake_clock.now + seconds
+    last_time = ""
+    while clock.fake_clock.now < end:
+        clock.time_source.tick()
+        current_time = clock.get_time_string()
+        if current_time != last_time or clock.is_transitioning:
+            yield current_time
+            last_time = current_time
+        clock.fake_clock.now = clock.scheduler.next_deadline(clock.is_transitioning, clock.tick_granularity())
+
+
+def make_clock(font, format_24h, animation, info, lines, cols):
+    """Build a headless clock for one benchmark case"""
+    clock = BenchClock(FakeClock(START_TIME))
+    clock.current_font = font
+    clock.format_24h = format_24h
+    clock.animation_enabled = animation
+    clock.show_date = True
+    clock.show_info = info
+    clock.load_fonts()
+    clock.attach(termclock.HeadlessBackend(lines, cols))
+    return clock
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_case(font, format_24h, animation, info, seconds, lines, cols):
+    """Benchmark one configuration and return its result record"""
+    # Timing pass
+    clock = make_clock(font, format_24h, animation, info, lines, cols)
+    durations = []
+    cells = []
+    for time_str in frames(clock, seconds):
+        written = clock.backend.cells_written
+        start = time.perf_counter()
+        clock.render_frame(time_str)
+        durations.append((time.perf_counter() - start) * 1e6)
+        cells.append(clock.backend.cells_written - written)
+
+    # Allocation pass, kept separate since tracing slows everything down
+    clock = make_clock(font, format_24h, animation, info, lines, cols)
+    allocations = []
+    blocks = []
+    tracemalloc.start()
+    try:
+        for time_str in frames(clock, seconds):
+            tracemalloc.reset_peak()
+            before_bytes = tracemalloc.get_traced_memory()[0]
+            before_blocks = sys.getallocatedblocks()
+            clock.render_frame(time_str)
+            allocations.append(tracemalloc.get_traced_memory()[1] - before_bytes)
+            blocks.append(sys.getallocatedblocks() - before_blocks)
+    finally:
+        tracemalloc.stop()
+
+    # The first frame paints the whole screen; report it separately
+    return {
+        'font': font,
+        'format': '24h' if format_24h else '12h',
+        'animation': animation,
+        'info': info,
+        'frames': len(durations),
+        'first_frame_us': round(durations[0], 1),
+        'p50_us': round(percentile(durations[1:], 50), 1),
+        'p99_us': round(percentile(durations[1:], 99), 1),
+        'alloc_peak_bytes_per_frame': int(percentile(allocations[1:], 50)),
+        'net_blocks_per_frame': round(sum(blocks[1:]) / max(1, len(blocks) - 1), 2),
+        'first_frame_cells': cells[0],
+        'cells_per_frame': round(sum(cells[1:]) / max(1, len(cells) - 1), 1)
+    }
+
+
+def case_key(result):
+    return (result['font'], result['format'], result['animation'], result['info'])
+
+
+def git_revision():
+    """Current commit of the checkout, if available"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    """Print a results table, with p50 deltas against a baseline run"""
+    previous = {case_key(r): r for r in (baseline or [])}
+    header = f"{'font':<9} {'fmt':<4} {'anim':<5} {'info':<5} {'frames':>6} {'p50 us':>8} {'p99 us':>8} {'alloc B':>8} {'cells':>7}"
+    if baseline is not None:
+        header += f" {'p50 delta':>10}"
+    print(header)
+    for r in results:
+        line = (f"{r['font']:<9} {r['format']:<4} {str(r['animation']):<5} {str(r['info']):<5} "
+                f"{r['frames']:>6} {r['p50_us']:>8} {r['p99_us']:>8} "
+                f"{r['alloc_peak_bytes_per_frame']:>8} {r['cells_per_frame']:>7}")
+        old = previous.get(case_key(r))
+        if old and old['p50_us']:
+            line += f" {(r['p50_us'] - old['p50_us']) / old['p50_us'] * 100:>+9.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the termclock render path')
+    parser.add_argument('--seconds', type=int, default=30, help='Simulated seconds per case')
+    parser.add_argument('--fonts', help='Comma-separated fonts to run (default: all)')
+    parser.add_argument('--size', default='24x80', help='Screen size as LINESxCOLS')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--compare', help='Compare against a previous JSON results file')
+    args = parser.parse_args()
+
+    lines, cols = (int(n) for n in args.size.lower().split('x'))
+    fonts = args.fonts.split(',') if args.fonts else list(termclock.TerminalClock.FONT_FILES)
+
+    results = []
+    for font, format_24h, animation, info in itertools.product(fonts, (True, False), (True, False), (False, True)):
+        results.append(run_case(font, format_24h, animation, info, args.seconds, lines, cols))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_results(results, baseline)
+
+    if args.output:
+        report = {
+            'revision': git_revision(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seconds': args.seconds,
+            'size': [lines, cols],
+            'results': results
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
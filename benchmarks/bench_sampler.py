@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+System info collection benchmarks for termclock.
+
+Times each metric SystemSampler collects, once through the /proc reader
+(ProcStats) and once through psutil when it is installed, and reports the
+median cost per sample.
+
+    python3 benchmarks/bench_sampler.py
+    python3 benchmarks/bench_sampler.py --items cpu,cpu:0,net:eth0,disk:/ --output results.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import termclock  # noqa: E402
+
+
+def sources():
+    """(name, stats) for every counter source available here"""
+    found = []
+    try:
+        found.append(('proc', termclock.ProcStats()))
+    except OSError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        found.append(('psutil', psutil))
+    return found
+
+
+def time_metric(sampler, metric, iterations):
+    """Median microseconds per sample of one metric"""
+    durations = []
+    now = time.monotonic()
+    for _ in range(iterations):
+        # Advance the sampler's clock so rates see a real interval
+        now += 1.0
+        start = time.perf_counter()
+        sampler._sample(metric, now)
+        durations.append((time.perf_counter() - start) * 1e6)
+    durations.sort()
+    return durations[len(durations) // 2]
+
+
+def run_source(stats, items, iterations):
+    """Median cost of each metric the items need, through one counter source"""
+    sampler = termclock.SystemSampler(items=items)
+    sampler._stats = stats
+    stats.cpu_percent(interval=None, percpu=True)
+    return {metric: round(time_metric(sampler, metric, iterations), 1) for metric in sampler.metrics()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark termclock system info collection')
+    parser.add_argument('--items', default=termclock.INFO_ITEMS, type=termclock.info_spec,
+                        help='Info items to collect, as for --info')
+    parser.add_argument('--iterations', type=int, default=200, help='Samples timed per metric')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {}
+    for name, stats in sources():
+        results[name] = run_source(stats, args.items, args.iterations)
+        if isinstance(stats, termclock.ProcStats):
+            stats.close()
+    if not results:
+        print("No counter source available (needs Linux /proc or psutil)")
+        return 1
+
+    names = list(results)
+    metrics = list(results[names[0]])
+    print(f"{'metric':<9}" + ''.join(f" {name + ' us':>10}" for name in names)
+          + (f" {'speedup':>8}" if len(names) == 2 else ''))
+    for metric in metrics:
+        line = f"{metric:<9}" + ''.join(f" {results[name][metric]:>10}" for name in names)
+        if len(names) == 2 and results[names[0]][metric]:
+            line += f" {results[names[1]][metric] / results[names[0]][metric]:>7.1f}x"
+        print(line)
+
+    if args.output:
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'items': args.items,
+            'iterations': args.iterations,
+            'results': results
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,12 +12,12 @@ echo "Detected OS: $OS_TYPE"
 
 # Check Python version
 PYTHON_VERSION=$(python3 --version 2>&1 | grep -oE '[0-9]+\.[0-9]+' | head -1)
-MIN_VERSION="3.6"
+MIN_VERSION="3.7"
 
 if [[ $(printf '%s\n' "$MIN_VERSION" "$PYTHON_VERSION" | sort -V | head -n1) == "$MIN_VERSION" ]]; then
     echo "Python version $PYTHON_VERSION detected. ✓"
 else
-    echo "Error: Python 3.6 or higher is required. Found version: $PYTHON_VERSION"
+    echo "Error: Python 3.7 or higher is required. Found version: $PYTHON_VERSION"
     exit 1
 fi
 
@@ -10,9 +10,9 @@ import shutil
 from pathlib import Path
 
 def check_python_version():
-    """Check if Python 3.6+ is available"""
-    if sys.version_info < (3, 6):
-        print(f"Error: Python 3.6 or higher is required. Found version: {'.'.join(map(str, sys.version_info[:2]))}")
+    """Check if Python 3.7+ is available"""
+    if sys.version_info < (3, 7):
+        print(f"Error: Python 3.7 or higher is required. Found version: {'.'.join(map(str, sys.version_info[:2]))}")
         return False
     return True
 
@@ -24,6 +24,11 @@ def install_dependencies():
         import psutil
         print("psutil is already installed.")
     except ImportError:
+        if sys.platform.startswith("linux"):
+            # System info is read straight from /proc, so there is nothing to
+            # download (which would fail on hosts without network access)
+            print("psutil not found; system info will be read from /proc.")
+            return True
         print("psutil not found, attempting to install...")
         try:
             # Try different methods to install psutil
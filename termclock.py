@@ -5,93 +5,2556 @@ A clean, customizable alternative to tty-clock with smooth animations
 and system information display.
 """
 
+import time
+STARTED = time.perf_counter()  # When loading began, for --bench-startup
+
 import os
 import sys
-import time
 import curses
-import argparse
-from datetime import datetime
-import json
-import threading
-from math import sin, pi
+import marshal
+import struct
+from collections import namedtuple, deque
 import math
 
+# Modules only some features need (argparse, threading, selectors, signal,
+# json, hashlib, psutil) are imported where they are used, so the first
+# frame isn't kept waiting for them
+
+# Immutable view of the most recent system metrics published by SystemSampler.
+# Fields hold raw values (None until the first sample); formatting happens in
+# TerminalClock.get_system_info(). disk, io and network map info items such as
+# 'disk:/data' or 'net:eth0' to their usage percent, I/O rate and (rx, tx)
+# rates, rates being bytes per second. history maps 'cpu', 'cpu:N', 'ram', disk
+# items and '<net item> rx'/'tx' to sparklines, and cost maps each metric to
+# the seconds its latest sample took. errors maps each metric whose latest
+# sample failed to the reason; error is 'psutil' when there is nothing to
+# sample with at all.
+SystemSnapshot = namedtuple('SystemSnapshot', ['cpu', 'cores', 'ram', 'disk', 'io', 'battery',
+                                               'network', 'history', 'cost', 'errors', 'error'])
+
+INFO_ITEMS = 'cpu,ram,disk,net,battery'  # Info panel rows when none are chosen
+
+
+def info_items(text):
+    """Parse an info item list such as 'cpu,net:eth0,disk:/data' into (name, argument) pairs
+
+    cpu:N is one core, disk:PATH the filesystem and device holding PATH, and
+    net:NAME one interface; without an argument they cover the whole machine.
+    """
+    items = []
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, arg = item.partition(':')
+        name = name.strip().lower()
+        arg = arg.strip()
+        if name not in ('cpu', 'ram', 'disk', 'net', 'battery'):
+            raise ValueError(f"unknown info item {name!r} (expected cpu, ram, disk, net or battery)")
+        if arg and name in ('ram', 'battery'):
+            raise ValueError(f"info item {name!r} takes no argument")
+        if arg and name == 'cpu' and not arg.isdigit():
+            raise ValueError(f"expected a core number in {item!r}")
+        if arg and name == 'disk' and not arg.startswith('/'):
+            raise ValueError(f"expected an absolute path in {item!r}")
+        if (name, arg) not in items:
+            items.append((name, arg))
+    if not items:
+        raise ValueError("expected at least one info item")
+    return items
+
+
+def info_spec(text):
+    """Validate an info item list, returning it in canonical form"""
+    return ','.join(f"{name}:{arg}" if arg else name for name, arg in info_items(text))
+
+
+class MetricHistory:
+    """Fixed-size ring buffer of samples, kept rendered as a sparkline"""
+
+    BARS = '▁▂▃▄▅▆▇█'
+
+    def __init__(self, size, ceiling=None):
+        from array import array
+        self.size = size
+        self.values = array('d', bytes(8 * size))
+        self.head = 0   # Slot the next sample goes into
+        self.count = 0
+        # Top of the scale: fixed for percentages, the window's peak for rates
+        self.ceiling = ceiling
+        self.scale = ceiling or 0.0
+        self.text = ' ' * size  # One column per sample, newest on the right
+
+    @classmethod
+    def bar(cls, value, scale):
+        """Sparkline column for one sample"""
+        if scale <= 0:
+            return cls.BARS[0]
+        return cls.BARS[max(0, min(len(cls.BARS) - 1, int(value / scale * len(cls.BARS))))]
+
+    def samples(self):
+        """Samples in the buffer, oldest first"""
+        if self.count < self.size:
+            return self.values[:self.count]
+        return self.values[self.head:] + self.values[:self.head]
+
+    def append(self, value):
+        """Add a sample, overwriting the oldest once the buffer is full"""
+        values = self.values
+        evicted = values[self.head] if self.count == self.size else None
+        values[self.head] = value
+        self.head = (self.head + 1) % self.size
+        self.count = min(self.count + 1, self.size)
+
+        if self.ceiling is None and (value > self.scale or evicted == self.scale):
+            peak = max(values)
+            if peak != self.scale:
+                # The peak moved, so every column changes height
+                self.scale = peak
+                self.text = ' ' * (self.size - self.count) + ''.join(
+                    self.bar(sample, peak) for sample in self.samples())
+                return
+        # Only the newest column is new; the rest shift left. The string is
+        # replaced whole, so readers on other threads never see it half done
+        self.text = self.text[1:] + self.bar(value, self.scale)
+
+
+class ProcStats:
+    """Linux system counters read straight from /proc and /sys, through psutil's interface
+
+    Covers the part of psutil that SystemSampler uses. Files are opened once
+    and re-read with os.pread(), so taking a sample opens and closes nothing.
+    """
+
+    MemoryUsage = namedtuple('MemoryUsage', ['total', 'available', 'percent'])
+    DiskUsage = namedtuple('DiskUsage', ['total', 'used', 'free', 'percent'])
+    DiskIO = namedtuple('DiskIO', ['read_bytes', 'write_bytes'])
+    NetIO = namedtuple('NetIO', ['bytes_sent', 'bytes_recv'])
+    Battery = namedtuple('Battery', ['percent', 'power_plugged'])
+    Partition = namedtuple('Partition', ['device', 'mountpoint', 'fstype'])
+
+    SECTOR = 512  # /proc/diskstats counts 512-byte sectors whatever the device
+
+    def __init__(self, proc='/proc', sysfs='/sys'):
+        self.proc = proc  # Where procfs and sysfs are mounted
+        self.power_supply = os.path.join(sysfs, 'class', 'power_supply')
+        self._fds = {}    # Path -> open descriptor
+        self._sizes = {}  # Path -> read size that last held the whole file
+        self._cpu_times = {}  # percpu -> [(busy, total)] at the previous cpu_percent()
+        # Fail here rather than on the first sample if there is no /proc
+        self._read(os.path.join(proc, 'stat'))
+        try:
+            # Whole disks, as opposed to their partitions
+            self._disks = set(os.listdir(os.path.join(sysfs, 'block')))
+        except OSError:
+            self._disks = set()
+        self._battery, self._mains = self._find_power_supplies()
+
+    def close(self):
+        """Close every file kept open"""
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+
+    def _read(self, path):
+        """Whole contents of a file, which stays open for the next read"""
+        fd = self._fds.get(path)
+        if fd is None:
+            fd = self._fds[path] = os.open(path, os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0))
+        size = self._sizes.get(path, 4096)
+        while True:
+            data = os.pread(fd, size, 0)
+            if len(data) < size:
+                break
+            # Filled the buffer, so there may be more
+            size *= 2
+        self._sizes[path] = size
+        return os.fsdecode(data)
+
+    def _find_power_supplies(self):
+        """Directories of the system battery and the mains adapter, or None"""
+        def attribute(path, name):
+            try:
+                with open(os.path.join(path, name)) as f:
+                    return f.read().strip()
+            except OSError:
+                return ''
+
+        battery = mains = None
+        try:
+            names = sorted(os.listdir(self.power_supply))
+        except OSError:
+            return None, None
+        for name in names:
+            path = os.path.join(self.power_supply, name)
+            kind = attribute(path, 'type')
+            if kind == 'Mains' and mains is None:
+                mains = path
+            # Mice and other peripherals report their batteries too
+            elif kind == 'Battery' and battery is None and attribute(path, 'scope') != 'Device':
+                battery = path
+        return battery, mains
+
+    def cpu_percent(self, interval=None, percpu=False):
+        """Busy percentage since the previous call, overall or per core (interval is ignored)"""
+        times = []
+        for line in self._read(os.path.join(self.proc, 'stat')).splitlines():
+            if not line.startswith('cpu'):
+                break  # The cpu lines come first
+            fields = line.split()
+            if (fields[0] == 'cpu') == percpu:
+                continue
+            # user nice system idle iowait irq softirq steal; guest time is
+            # already counted in user
+            values = [int(value) for value in fields[1:9]]
+            total = sum(values)
+            times.append((total - values[3] - values[4], total))
+        previous = self._cpu_times.get(percpu) or [(0, 0)] * len(times)
+        self._cpu_times[percpu] = times
+        percents = []
+        for (busy, total), (last_busy, last_total) in zip(times, previous):
+            elapsed = total - last_total
+            percents.append(round(min(100.0, max(0.0, (busy - last_busy) / elapsed * 100)), 1) if elapsed > 0 else 0.0)
+        return percents if percpu else (percents[0] if percents else 0.0)
+
+    def virtual_memory(self):
+        """Total and available memory in bytes, and the percentage in use"""
+        meminfo = {}
+        # The fields needed are among the first few lines; the rest stays unsplit
+        for line in self._read(os.path.join(self.proc, 'meminfo')).split('\n', 8):
+            key, _, value = line.partition(':')
+            if key in ('MemTotal', 'MemFree', 'MemAvailable', 'Buffers', 'Cached'):
+                meminfo[key] = int(value.split()[0]) * 1024
+                if key == 'Cached':
+                    break  # Everything needed comes before it
+        total = meminfo['MemTotal']
+        available = meminfo.get('MemAvailable')
+        if available is None:
+            # Kernels before 3.14 don't estimate it
+            available = meminfo['MemFree'] + meminfo.get('Buffers', 0) + meminfo.get('Cached', 0)
+        return self.MemoryUsage(total, available, round((total - available) / total * 100, 1) if total else 0.0)
+
+    def disk_usage(self, path):
+        """Size, used and free bytes of the filesystem holding a path"""
+        st = os.statvfs(path)
+        total = st.f_blocks * st.f_frsize
+        used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        free = st.f_bavail * st.f_frsize
+        # Like df, space reserved for root counts as neither used nor free
+        percent = round(used / (used + free) * 100, 1) if used + free else 0.0
+        return self.DiskUsage(total, used, free, percent)
+
+    def disk_io_counters(self, perdisk=False):
+        """Bytes read and written, summed over whole disks or per device"""
+        devices = {}
+        for line in self._read(os.path.join(self.proc, 'diskstats')).splitlines():
+            fields = line.split()
+            if len(fields) >= 10:
+                devices[fields[2]] = self.DiskIO(int(fields[5]) * self.SECTOR, int(fields[9]) * self.SECTOR)
+        if perdisk:
+            return devices
+        # Partitions would count their disk's traffic twice
+        disks = [counters for name, counters in devices.items() if name in self._disks]
+        if not disks:
+            return None
+        return self.DiskIO(sum(disk.read_bytes for disk in disks), sum(disk.write_bytes for disk in disks))
+
+    def net_io_counters(self, pernic=False):
+        """Bytes sent and received, summed over all interfaces or per interface"""
+        nics = {}
+        # Two header lines, then "name: 8 receive counters, 8 transmit counters"
+        for line in self._read(os.path.join(self.proc, 'net', 'dev')).splitlines()[2:]:
+            name, _, counters = line.partition(':')
+            fields = counters.split()
+            nics[name.strip()] = self.NetIO(int(fields[8]), int(fields[0]))
+        if pernic:
+            return nics
+        return self.NetIO(sum(nic.bytes_sent for nic in nics.values()), sum(nic.bytes_recv for nic in nics.values()))
+
+    def sensors_battery(self):
+        """Battery charge and whether mains power is connected, or None without a battery"""
+        if self._battery is None:
+            return None
+        try:
+            percent = float(self._read(os.path.join(self._battery, 'capacity')))
+            status = self._read(os.path.join(self._battery, 'status')).strip()
+        except (OSError, ValueError):
+            return None
+        plugged = None
+        if self._mains is not None:
+            try:
+                plugged = self._read(os.path.join(self._mains, 'online')).strip() == '1'
+            except OSError:
+                pass
+        if plugged is None:
+            plugged = status in ('Charging', 'Full') if status != 'Unknown' else None
+        return self.Battery(percent, plugged)
+
+    def disk_partitions(self, all=False):
+        """Mounted filesystems; without all, only those backed by a device"""
+        partitions = []
+        for line in self._read(os.path.join(self.proc, 'self', 'mounts')).splitlines():
+            fields = line.split()
+            if len(fields) < 3 or not (all or fields[0].startswith('/')):
+                continue
+            # Spaces and other awkward characters are escaped as \ooo
+            mountpoint = fields[1]
+            if '\\' in mountpoint:
+                import re
+                mountpoint = re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), mountpoint)
+            partitions.append(self.Partition(fields[0], mountpoint, fields[2]))
+        return partitions
+
+
+def system_stats():
+    """Source of system counters: ProcStats on Linux, otherwise psutil
+
+    Raises ImportError when neither is available.
+    """
+    if sys.platform.startswith('linux'):
+        try:
+            return ProcStats()
+        except OSError:
+            pass  # No /proc, as in some containers; psutil may still work
+    import psutil
+    return psutil
+
+
+class SystemSampler:
+    """Poll system metrics on a background thread and publish snapshots"""
+
+    # Seconds between samples of each metric
+    DEFAULT_INTERVALS = {
+        'cpu': 1.0,
+        'ram': 2.0,
+        'disk': 30.0,
+        'io': 2.0,
+        'battery': 15.0,
+        'network': 2.0
+    }
+
+    # Info item -> the metrics it needs; battery is always sampled since
+    # power save reads it even when it isn't shown
+    ITEM_METRICS = {
+        'cpu': ('cpu',),
+        'ram': ('ram',),
+        'disk': ('disk', 'io'),
+        'net': ('network',),
+        'battery': ()
+    }
+
+    HISTORY = 13  # Samples kept per metric, one sparkline column each
+
+    def __init__(self, intervals=None, items=INFO_ITEMS):
+        self.intervals = dict(self.DEFAULT_INTERVALS)
+        if intervals:
+            self.intervals.update(intervals)
+        self.items = info_items(items)
+        import threading
+        self._snapshot = SystemSnapshot(cpu=None, cores=None, ram=None, disk={}, io={}, battery=None,
+                                        network={}, history={}, cost={}, errors={}, error=None)
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._stats = None
+        self._counters = {}  # Counter name -> (total, monotonic time) at the last sample
+        self._history = {}   # Metric name -> MetricHistory, only touched by the thread
+        self._devices = {}   # disk:PATH item -> block device name, looked up once
+
+    def start(self):
+        """Start the sampler thread"""
+        if self._thread is not None:
+            return
+        import threading
+        self._thread = threading.Thread(target=self._run, name='termclock-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the sampler thread and wait for it to exit"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def snapshot(self):
+        """Return the latest published snapshot"""
+        return self._snapshot
+
+    def metrics(self):
+        """Metrics the chosen items need, in sampling order"""
+        needed = {'battery'}
+        for name, _ in self.items:
+            needed.update(self.ITEM_METRICS[name])
+        return [metric for metric in self.intervals if metric in needed]
+
+    def _items(self, name):
+        """(item, argument) of every chosen item with this name"""
+        return [(f"{name}:{arg}" if arg else name, arg) for item_name, arg in self.items if item_name == name]
+
+    def _sample(self, metric, now):
+        """Take a single sample of one metric, returning the snapshot fields it sets"""
+        stats = self._stats  # psutil itself, or ProcStats
+        if metric == 'cpu':
+            # One read of the per-core counters; the total is their average
+            cores = tuple(stats.cpu_percent(interval=None, percpu=True))
+            cpu = sum(cores) / len(cores) if cores else 0.0
+            self._record('cpu', cpu, 100.0)
+            for item, arg in self._items('cpu'):
+                if arg and int(arg) < len(cores):
+                    self._record(item, cores[int(arg)], 100.0)
+            return {'cpu': cpu, 'cores': cores}
+        if metric == 'ram':
+            ram = stats.virtual_memory().percent
+            self._record('ram', ram, 100.0)
+            return {'ram': ram}
+        if metric == 'disk':
+            disk = {}
+            for item, arg in self._items('disk'):
+                try:
+                    usage = stats.disk_usage(arg or '/')
+                except OSError:
+                    disk[item] = None
+                    continue
+                # As df reports it; also safe for mounts with a total of 0
+                disk[item] = int(usage.percent)
+            return {'disk': disk}
+        if metric == 'io':
+            items = self._items('disk')
+            # Whole-disk counters only when some item names a path
+            per_disk = stats.disk_io_counters(perdisk=True) if any(arg for _, arg in items) else {}
+            io = {}
+            for item, arg in items:
+                counters = per_disk.get(self._device(item, arg)) if arg else stats.disk_io_counters()
+                if counters is None:
+                    io[item] = None
+                    continue
+                io[item] = self._rate(item, counters.read_bytes + counters.write_bytes, now)
+                self._record(item, io[item])
+            return {'io': io}
+        if metric == 'battery':
+            if not hasattr(stats, "sensors_battery"):
+                return {'battery': None}
+            battery = stats.sensors_battery()
+            if battery is None:
+                return {'battery': None}
+            return {'battery': (int(battery.percent), battery.power_plugged)}
+        if metric == 'network':
+            items = self._items('net')
+            per_nic = stats.net_io_counters(pernic=True) if any(arg for _, arg in items) else {}
+            network = {}
+            for item, arg in items:
+                counters = per_nic.get(arg) if arg else stats.net_io_counters()
+                if counters is None:
+                    network[item] = None
+                    continue
+                rx = self._rate(f"{item} rx", counters.bytes_recv, now)
+                tx = self._rate(f"{item} tx", counters.bytes_sent, now)
+                self._record(f"{item} rx", rx)
+                self._record(f"{item} tx", tx)
+                network[item] = (rx, tx) if rx is not None else None
+            return {'network': network}
+        return {}
+
+    def _device(self, item, path):
+        """Block device holding a path, as named in the per-disk counters"""
+        device = self._devices.get(item)
+        if device is None:
+            # The deepest mount point containing the path wins
+            path = os.path.realpath(path)
+            mounts = [part for part in self._stats.disk_partitions(all=False)
+                      if path == part.mountpoint or path.startswith(part.mountpoint.rstrip('/') + '/')]
+            if mounts:
+                mount = max(mounts, key=lambda part: len(part.mountpoint))
+                # /dev/mapper/* and /dev/disk/by-* are links to the kernel's name
+                device = os.path.basename(os.path.realpath(mount.device))
+            self._devices[item] = device = device or ''
+        return device
+
+    def _rate(self, name, total, now):
+        """Per-second rate of a cumulative counter since its previous sample"""
+        previous = self._counters.get(name)
+        self._counters[name] = (total, now)
+        if previous is None or now <= previous[1]:
+            return None
+        # Counters can go backwards when an interface or disk disappears
+        return max(0.0, (total - previous[0]) / (now - previous[1]))
+
+    def _record(self, name, value, ceiling=None):
+        """Append a sample to a metric's history"""
+        if value is None:
+            return
+        history = self._history.get(name)
+        if history is None:
+            history = self._history[name] = MetricHistory(self.HISTORY, ceiling)
+        history.append(value)
+
+    def _run(self):
+        """Sampler thread body"""
+        # Counters are opened (or psutil imported) here so it doesn't delay the caller
+        try:
+            stats = system_stats()
+        except ImportError:
+            self._snapshot = self._snapshot._replace(error='psutil')
+            return
+        self._stats = stats
+        try:
+            self._sample_until_stopped()
+        finally:
+            if isinstance(stats, ProcStats):
+                stats.close()
+
+    def _sample_until_stopped(self):
+        """Take each metric's samples when due until stop() is called"""
+        # Prime the CPU counters so later non-blocking calls return a
+        # percentage measured since the previous sample
+        self._stats.cpu_percent(interval=None, percpu=True)
+        
+        next_due = dict.fromkeys(self.metrics(), 0.0)
+        cost = {}
+        errors = {}
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            updates = {}
+            for metric, due in next_due.items():
+                if now >= due:
+                    started = time.perf_counter()
+                    try:
+                        updates.update(self._sample(metric, now))
+                    except Exception as e:
+                        # Other metrics carry on; this one recovers on its next good sample
+                        errors[metric] = str(e)
+                    else:
+                        errors.pop(metric, None)
+                    cost[metric] = time.perf_counter() - started
+                    next_due[metric] = now + self.intervals[metric]
+            if updates:
+                # Publish a new immutable snapshot; readers only ever see a
+                # complete tuple since attribute assignment is atomic
+                updates['history'] = {name: history.text for name, history in self._history.items()}
+                updates['cost'] = dict(cost)
+                updates['errors'] = dict(errors)
+                self._snapshot = self._snapshot._replace(**updates)
+            self._stop_event.wait(max(0.01, min(next_due.values()) - time.monotonic()))
+
+
+def format_rate(rate):
+    """Short bytes-per-second string such as 340K/s or 1.2M/s"""
+    for unit in 'BKMG':
+        if rate < 1000 or unit == 'G':
+            break
+        rate /= 1024
+    if unit == 'B' or rate >= 10:
+        return f"{rate:.0f}{unit}/s"
+    return f"{rate:.1f}{unit}/s"
+
+
+def time_format(format_24h=True, seconds=True):
+    """strftime format for the clock"""
+    if format_24h:
+        return "%H:%M:%S" if seconds else "%H:%M"
+    return "%I:%M:%S %p" if seconds else "%I:%M %p"
+
+
+class TimeSource:
+    """Wall-clock time read once per frame, with formatting cached per second and day"""
+
+    def __init__(self, wall=time.time, monotonic_ns=time.monotonic_ns):
+        self._wall = wall
+        self._monotonic_ns = monotonic_ns
+        self.mono_ns = 0  # Monotonic reading of the current tick, for timers
+        self.now = 0.0
+        self.second = None
+        self.local = None
+        self._time_key = None
+        self._time_str = ""
+        self._date_key = None
+        self._date_str = ""
+
+    def time(self):
+        """Current wall-clock time
+
+        Read afresh every time: the monotonic clock stops during suspend and
+        ignores clock steps, so an estimate from it can be off by hours.
+        """
+        return self._wall()
+
+    def tick(self):
+        """Read the clock for this frame; every string for the frame uses this reading"""
+        now = self.time()
+        if self.now - 1.0 < now < self.now:
+            # The clock was stepped slightly back, e.g. by NTP; don't let
+            # the displayed time step backwards
+            now = self.now
+        self.now = now
+        self.mono_ns = self._monotonic_ns()
+        second = int(now // 1)
+        if second != self.second:
+            self.second = second
+            self.local = time.localtime(second)
+        return now
+
+    def time_string(self, format_24h=True, seconds=True):
+        """Time of the current tick, formatted once per second"""
+        if self.local is None:
+            self.tick()
+        key = (self.second, format_24h, seconds)
+        if key != self._time_key:
+            self._time_str = time.strftime(time_format(format_24h, seconds), self.local)
+            self._time_key = key
+        return self._time_str
+
+    def date_string(self):
+        """Date of the current tick, formatted once per day"""
+        if self.local is None:
+            self.tick()
+        key = self.local[:3]
+        if key != self._date_key:
+            self._date_str = time.strftime("%A, %B %d, %Y", self.local)
+            self._date_key = key
+        return self._date_str
+
+
+class FrameScheduler:
+    """Compute frame deadlines aligned to wall-clock second (or minute) boundaries"""
+
+    def __init__(self, frame_interval=0.05, clock=time.time):
+        self.frame_interval = frame_interval  # Seconds between animation frames
+        self.clock = clock
+        self.deadline = None
+
+    def next_deadline(self, animating=False, granularity=1):
+        """Return the wall-clock time at which the next frame is due"""
+        now = self.clock()
+        # Next tick boundary: every second, or every minute when seconds are hidden
+        next_second = (math.floor(now / granularity) + 1.0) * granularity
+        if animating:
+            # Step from the previous deadline rather than from now so time
+            # spent drawing doesn't stretch the animation; if we've fallen a
+            # whole frame behind, resynchronise instead of bursting frames
+            deadline = now + self.frame_interval
+            if self.deadline is not None and now < self.deadline + self.frame_interval:
+                deadline = self.deadline + self.frame_interval
+            # Never let an animation frame delay the next second's tick
+            deadline = min(deadline, next_second)
+        else:
+            deadline = next_second
+        self.deadline = deadline
+        return deadline
+
+    def bring_forward(self, seconds):
+        """Move the deadline earlier, to at most this many seconds from now"""
+        deadline = self.clock() + seconds
+        if self.deadline is None or deadline < self.deadline:
+            self.deadline = deadline
+        return self.deadline
+
+    def remaining(self):
+        """Seconds left until the current deadline"""
+        if self.deadline is None:
+            return 0.0
+        return self.deadline - self.clock()
+
+
+class CursesBackend:
+    """Render backend that draws to a curses window"""
+
+    def __init__(self, stdscr):
+        self.stdscr = stdscr
+
+    def size(self):
+        """Return the screen size as (lines, cols)"""
+        return curses.LINES, curses.COLS
+
+    def init_pairs(self, pairs):
+        """Register a color pair per (foreground, background) color spec and return their attributes"""
+        attrs = []
+        for i, (fg, bg) in enumerate(pairs, 1):
+            if i >= curses.COLOR_PAIRS:
+                attrs.append(0)  # Out of pairs; draw in the terminal's colors
+                continue
+            try:
+                curses.init_pair(i, resolve_color(fg, curses.COLORS), resolve_color(bg, curses.COLORS))
+            except (curses.error, ValueError, OverflowError):
+                # curses built without extended colors; settle for 256
+                curses.init_pair(i, resolve_color(fg, 256), resolve_color(bg, 256))
+            attrs.append(curses.color_pair(i))
+        return attrs
+
+    def set_background(self, attr):
+        """Fill untouched cells with the given attribute's background"""
+        self.stdscr.bkgd(' ', attr)
+
+    def clear(self):
+        """Blank the whole screen"""
+        self.stdscr.erase()
+
+    def write(self, y, x, text, attr):
+        """Write a run of cells to the screen"""
+        try:
+            self.stdscr.addstr(y, x, text, attr)
+        except curses.error:
+            # Writing the bottom-right cell moves the cursor off-screen,
+            # which curses reports as an error after drawing the text
+            pass
+
+    def flush(self):
+        """Push the pending writes to the terminal"""
+        self.stdscr.noutrefresh()
+        curses.doupdate()
+
+
+class HeadlessBackend:
+    """Render backend that keeps frames in memory instead of a terminal"""
+
+    def __init__(self, lines=24, cols=80):
+        self.lines = lines
+        self.cols = cols
+        self.cells_written = 0  # Running total, for benchmarks
+        self.background = 0
+        self.clear()
+
+    def size(self):
+        """Return the screen size as (lines, cols)"""
+        return self.lines, self.cols
+
+    def resize(self, lines, cols):
+        """Change the framebuffer size, as a terminal resize would"""
+        self.lines = lines
+        self.cols = cols
+        self.clear()
+
+    def init_pairs(self, pairs):
+        """Color pairs are reported by number, as curses numbers them"""
+        return list(range(1, len(pairs) + 1))
+
+    def set_background(self, attr):
+        """Remember the background attribute"""
+        self.background = attr
+
+    def clear(self):
+        """Blank the whole framebuffer"""
+        self.chars = [[' '] * self.cols for _ in range(self.lines)]
+        self.attrs = [[0] * self.cols for _ in range(self.lines)]
+
+    def write(self, y, x, text, attr):
+        """Write a run of cells to the framebuffer"""
+        if not 0 <= y < self.lines:
+            return
+        chars = self.chars[y]
+        attrs = self.attrs[y]
+        self.cells_written += len(text)
+        for i, ch in enumerate(text):
+            if 0 <= x + i < self.cols:
+                chars[x + i] = ch
+                attrs[x + i] = attr
+
+    def flush(self):
+        """Nothing to push; the framebuffer is always current"""
+
+    def frame(self):
+        """Return the current frame as rows of (char, attr) cells"""
+        return [list(zip(chars, attrs)) for chars, attrs in zip(self.chars, self.attrs)]
+
+    def text(self):
+        """Return the current frame as plain text lines"""
+        return [''.join(chars) for chars in self.chars]
+
+
+class RecordingBackend(HeadlessBackend):
+    """Headless backend that also records the changes of each frame, for --serve"""
+
+    def __init__(self, lines=24, cols=80):
+        self.ops = []  # Changes since take(): None for a clear, else (y, x, text, attr)
+        super().__init__(lines, cols)
+
+    def clear(self):
+        """Blank the framebuffer; changes recorded before it no longer matter"""
+        super().clear()
+        self.ops = [None]
+
+    def write(self, y, x, text, attr):
+        """Write a run of cells and record it"""
+        super().write(y, x, text, attr)
+        self.ops.append((y, x, text, attr))
+
+    def take(self):
+        """Return the changes recorded since the last call"""
+        ops = self.ops
+        self.ops = []
+        return ops
+
+    def replay(self):
+        """Changes that draw the current frame on a blank screen"""
+        ops = [None]
+        cols = self.cols
+        for y, (chars, attrs) in enumerate(zip(self.chars, self.attrs)):
+            x = 0
+            while x < cols:
+                attr = attrs[x]
+                end = x + 1
+                while end < cols and attrs[end] == attr:
+                    end += 1
+                text = ''.join(chars[x:end])
+                if attr or not text.isspace():
+                    ops.append((y, x, text, attr))
+                x = end
+        return ops
+
+
+class StreamWriter:
+    """Non-blocking writer that holds back output a slow stream hasn't taken yet"""
+
+    def __init__(self, fd):
+        self.fd = fd
+        self.pending = b''
+
+    def send(self, data):
+        """Queue data and write as much as the stream accepts"""
+        self.pending += data
+        return self.drain()
+
+    def drain(self):
+        """Write pending output without blocking, returning whether all of it went out"""
+        while self.pending:
+            try:
+                written = os.write(self.fd, self.pending)
+            except BlockingIOError:
+                return False
+            self.pending = self.pending[written:]
+        return True
+
+
+class AnsiBackend:
+    """Render backend that writes cursor-addressed ANSI diffs to a stream"""
+
+    def __init__(self, writer, lines, cols, colors=256):
+        self.writer = writer
+        self.lines = lines
+        self.cols = cols
+        self.colors = colors  # As curses.COLORS: 8, 256 or 1 << 24
+        self.sgr = ['\x1b[0m']  # Pair number -> SGR sequence; 0 is the terminal's colors
+        self.background = 0
+        self.parts = []  # Output of the frame being built
+        self.row = 0  # Cursor position relative to the block's top left
+        self.col = 0
+        self.attr = None
+        self.started = False
+
+    def size(self):
+        """Return the block size as (lines, cols)"""
+        return self.lines, self.cols
+
+    def init_pairs(self, pairs):
+        """Build an SGR sequence per (foreground, background) color spec"""
+        for fg, bg in pairs:
+            self.sgr.append(f"\x1b[0;{self.sgr_color(fg, 30)};{self.sgr_color(bg, 40)}m")
+        return list(range(1, len(pairs) + 1))
+
+    def sgr_color(self, spec, base):
+        """SGR parameters for a color, with base 30 for foreground or 40 for background"""
+        n = resolve_color(spec, self.colors)
+        if n < 0:
+            return str(base + 9)
+        if n < 8:
+            return str(base + n)
+        if n < 16:
+            return str(base + 60 + n - 8)
+        if n < 256:
+            return f"{base + 8};5;{n}"
+        return f"{base + 8};2;{n >> 16};{(n >> 8) & 0xff};{n & 0xff}"
+
+    def set_background(self, attr):
+        """Color blank cells with the given attribute"""
+        self.background = attr
+
+    def clear(self):
+        """Blank the block, making room for it below the cursor on the first frame"""
+        if not self.started:
+            self.parts.append('\n' * (self.lines - 1))
+            self.row = self.lines - 1
+            self.col = 0
+            self.started = True
+        self.move(0, 0)
+        self.parts.append(self.sgr[self.background] + '\x1b[J')
+        self.attr = self.background
+
+    def move(self, y, x):
+        """Move the cursor with relative sequences, so the block can sit anywhere"""
+        parts = self.parts
+        if y < self.row:
+            parts.append(f'\x1b[{self.row - y}A')
+        elif y > self.row:
+            parts.append(f'\x1b[{y - self.row}B')
+        if x != self.col:
+            parts.append(f'\r\x1b[{x}C' if x else '\r')
+        self.row = y
+        self.col = x
+
+    def write(self, y, x, text, attr):
+        """Queue a run of cells"""
+        if not 0 <= y < self.lines:
+            return
+        self.move(y, x)
+        attr = attr or self.background
+        if attr != self.attr:
+            self.parts.append(self.sgr[attr])
+            self.attr = attr
+        self.parts.append(text)
+        self.col = x + len(text)
+
+    def flush(self):
+        """Send the frame and park the cursor on the block's last row"""
+        self.move(self.lines - 1, 0)
+        self.parts.append('\x1b[0m')
+        self.attr = None
+        data = ''.join(self.parts).encode()
+        self.parts = []
+        self.writer.send(data)
+
+
+class Renderer:
+    """Damage-tracking renderer that only writes cells changed since the last frame"""
+
+    BLANK = (' ', 0)
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.front = {}  # Row -> list of (x, text, attr) spans currently on screen
+        self.back = {}   # Row -> spans of the frame being built
+        self.size = None
+        self.full_redraw = True
+
+    def invalidate(self):
+        """Force the next frame to repaint the whole screen"""
+        self.full_redraw = True
+
+    def begin_frame(self):
+        """Start building a new frame"""
+        self.back = {}
+
+    def put(self, y, x, text, attr=0):
+        """Queue text for the frame being built"""
+        spans = self.back.get(y)
+        if spans is None:
+            self.back[y] = [(x, text, attr)]
+        else:
+            spans.append((x, text, attr))
+
+    def end_frame(self):
+        """Write the cells that differ from the previous frame to the backend"""
+        size = self.backend.size()
+        if self.full_redraw or size != self.size:
+            self.backend.clear()
+            self.front = {}
+            self.size = size
+            self.full_redraw = False
+
+        lines, cols = size
+        for y in set(self.front) | set(self.back):
+            old_spans = self.front.get(y)
+            new_spans = self.back.get(y)
+            if old_spans == new_spans or not 0 <= y < lines:
+                continue
+            self.update_row(y, old_spans or (), new_spans or (), cols)
+
+        self.front = self.back
+        self.back = {}
+        self.backend.flush()
+
+    def update_row(self, y, old_spans, new_spans, cols):
+        """Emit runs of changed cells within a single row"""
+        if self.same_shape(old_spans, new_spans):
+            # Fast path: only the text of some spans changed, so only those
+            # spans need comparing
+            write = self.backend.write
+            for (x, old_text, attr), (_, new_text, _) in zip(old_spans, new_spans):
+                if old_text == new_text:
+                    continue
+                run_start = None
+                for i, (old_ch, new_ch) in enumerate(zip(old_text, new_text)):
+                    if old_ch != new_ch:
+                        if run_start is None:
+                            run_start = i
+                    elif run_start is not None:
+                        if 0 <= x + run_start < cols:
+                            write(y, x + run_start, new_text[run_start:min(i, cols - x)], attr)
+                        run_start = None
+                if run_start is not None and 0 <= x + run_start < cols:
+                    write(y, x + run_start, new_text[run_start:cols - x], attr)
+            return
+
+        old_cells = self.row_cells(old_spans, cols)
+        new_cells = self.row_cells(new_spans, cols)
+        blank = self.BLANK
+        write = self.backend.write
+
+        run_x = None
+        run_chars = []
+        run_attr = 0
+        for x in sorted(set(old_cells) | set(new_cells)):
+            cell = new_cells.get(x, blank)
+            if cell == old_cells.get(x, blank):
+                continue
+            ch, attr = cell
+            if run_x is not None and x == run_x + len(run_chars) and attr == run_attr:
+                run_chars.append(ch)
+                continue
+            if run_x is not None:
+                write(y, run_x, ''.join(run_chars), run_attr)
+            run_x, run_chars, run_attr = x, [ch], attr
+        if run_x is not None:
+            write(y, run_x, ''.join(run_chars), run_attr)
+
+    @staticmethod
+    def same_shape(old_spans, new_spans):
+        """Whether two rows have identical, non-overlapping span positions"""
+        if len(old_spans) != len(new_spans):
+            return False
+        end = None
+        for (old_x, old_text, old_attr), (new_x, new_text, new_attr) in zip(old_spans, new_spans):
+            if old_x != new_x or old_attr != new_attr or len(old_text) != len(new_text):
+                return False
+            if end is not None and new_x < end:
+                return False
+            end = new_x + len(new_text)
+        return True
+
+    @staticmethod
+    def row_cells(spans, cols):
+        """Flatten a row's spans into a column -> (char, attr) mapping"""
+        cells = {}
+        for x, text, attr in spans:
+            for i, ch in enumerate(text):
+                if 0 <= x + i < cols:
+                    cells[x + i] = (ch, attr)
+        return cells
+
+
+class GlyphAtlas:
+    """A font compiled into fixed-size glyphs ready for drawing"""
+
+    # Bump when the cached layout changes so stale caches are ignored
+    CACHE_VERSION = 2
+    REQUIRED_CHARS = '0123456789:'
+    FILLED_CHARS = REQUIRED_CHARS + '.'  # Taken from the default font when a font lacks them
+
+    # Quadrant block for each 2x2 ink pattern (bits: 1 top left, 2 top right,
+    # 4 bottom left, 8 bottom right)
+    QUADRANTS = ' ▘▝▀▖▌▞▛▗▚▐▜▄▙▟█'
+
+    def __init__(self, name, glyphs, width, height, scale=1, rasterizer=None):
+        self.name = name
+        self.glyphs = glyphs  # Char -> tuple of rows, each exactly `width` wide
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.rasterizer = rasterizer  # StrokeFont that drew the glyphs, if any
+        self.fallback = glyphs['0']
+        self.blank = (' ' * width,) * height
+        # Bit-plane form of the glyphs for transitions, built on first use
+        self.inks = None  # ' ', then every ink character; a cell holds an index into it
+        self.depth = 1  # Bit planes per row, enough for every ink index
+        self.planes = None  # Char -> tuple of rows, each one int holding all its planes
+        self.row_texts = {}  # Row int -> its string, built once
+
+    def glyph(self, char):
+        """Return the rows for a character, falling back to '0'"""
+        return self.glyphs.get(char, self.fallback)
+
+    def bits(self, char):
+        """Return a character as rows of bit planes, falling back to '0'"""
+        if self.planes is None:
+            self.encode_planes()
+        planes = self.planes.get(char)
+        return planes if planes is not None else self.planes['0']
+
+    def encode_planes(self):
+        """Convert every glyph to bit planes, one int per row
+
+        Bit c of plane b is bit b of the ink index in column c; plane b takes
+        bits b * width to (b + 1) * width - 1 of the row. A font with a single
+        ink character has one plane, so a row is just its ink mask.
+        """
+        inks = ' ' + ''.join(sorted({ch for rows in self.glyphs.values() for row in rows for ch in row} - {' '}))
+        index = {ch: i for i, ch in enumerate(inks)}
+        width = self.width
+        planes = {}
+        row_texts = self.row_texts
+        for char, rows in self.glyphs.items():
+            encoded = []
+            for row in rows:
+                bits = 0
+                for c, ch in enumerate(row):
+                    i = index[ch]
+                    b = 0
+                    while i:
+                        if i & 1:
+                            bits |= 1 << (b * width + c)
+                        i >>= 1
+                        b += 1
+                row_texts[bits] = row
+                encoded.append(bits)
+            planes[char] = tuple(encoded)
+        self.inks = inks
+        self.depth = max(1, (len(inks) - 1).bit_length())
+        self.planes = planes
+
+    def ink(self, bits):
+        """Cells of a row holding any ink, as a mask of columns"""
+        if self.depth == 1:
+            return bits
+        width = self.width
+        column_mask = (1 << width) - 1
+        ink = 0
+        for b in range(self.depth):
+            ink |= bits >> (b * width)
+        return ink & column_mask
+
+    def spread(self, mask):
+        """Copy a mask of columns into every plane, to select whole cells"""
+        if self.depth == 1:
+            return mask
+        return mask * sum(1 << (b * self.width) for b in range(self.depth))
+
+    def rows(self, bits):
+        """Turn rows of bit planes back into strings, building each distinct row once"""
+        row_texts = self.row_texts
+        try:
+            return tuple(map(row_texts.__getitem__, bits))
+        except KeyError:
+            pass
+        inks = self.inks
+        width = self.width
+        for row in bits:
+            if row not in row_texts:
+                row_texts[row] = ''.join(
+                    inks[sum((row >> (b * width + c) & 1) << b for b in range(self.depth))]
+                    for c in range(width)
+                )
+        return tuple(map(row_texts.__getitem__, bits))
+
+    def scaled(self, scale):
+        """This atlas enlarged by a whole or half-step factor"""
+        if scale == 1:
+            return self
+        if self.rasterizer is not None:
+            # Procedural fonts are drawn again at the new size rather than enlarged
+            return self.rasterizer.atlas(scale)
+        glyphs = {char: self.scale_rows(rows, scale) for char, rows in self.glyphs.items()}
+        width = -(-int(self.width * scale * 2) // 2)
+        height = -(-int(self.height * scale * 2) // 2)
+        return GlyphAtlas(self.name, glyphs, width, height, scale)
+
+    def scale_rows(self, rows, scale):
+        """Enlarge a glyph (or a transition frame) of this atlas's size"""
+        if scale == int(scale):
+            # Whole steps repeat each cell, keeping the font's own characters
+            n = int(scale)
+            return tuple(''.join(ch * n for ch in row) for row in rows for _ in range(n))
+        # Half steps draw the ink on a grid of quadrant blocks, which have
+        # twice the resolution of a cell in each direction
+        n = int(scale * 2)  # Quadrants per font cell
+        return self.quadrant_rows(rows, n, -(-self.width * n // 2), -(-self.height * n // 2))
+
+    @classmethod
+    def quadrant_rows(cls, rows, n, width, height):
+        """Render a glyph's ink n quadrants per cell"""
+        ink = []
+        for row in rows:
+            line = [ch != ' ' for ch in row for _ in range(n)]
+            line += [False] * (width * 2 - len(line))
+            ink.extend([line] * n)
+        ink += [[False] * (width * 2)] * (height * 2 - len(ink))
+        quadrants = cls.QUADRANTS
+        return tuple(
+            ''.join(
+                quadrants[top[x] | top[x + 1] << 1 | bottom[x] << 2 | bottom[x + 1] << 3]
+                for x in range(0, width * 2, 2)
+            )
+            for top, bottom in zip(ink[0::2], ink[1::2])
+        )
+
+    @classmethod
+    def compile(cls, name, font, default_font):
+        """Build an atlas from a parsed font, filling in missing characters"""
+        chars = {}
+        for char, rows in font.items():
+            if len(char) == 1 and any(row.strip() for row in rows):
+                chars[char] = [row.rstrip('\r\n') for row in rows]
+        for char in cls.FILLED_CHARS:
+            if char not in chars:
+                chars[char] = default_font[char]
+
+        height = max(len(rows) for rows in chars.values())
+        width = max(len(row) for rows in chars.values() for row in rows)
+        glyphs = {}
+        for char, rows in chars.items():
+            rows = list(rows) + [''] * (height - len(rows))
+            glyphs[char] = tuple(row.ljust(width) for row in rows)
+        return cls(name, glyphs, width, height)
+
+    @staticmethod
+    def cache_path(name):
+        """Location of the on-disk cache for a font"""
+        cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+        return os.path.join(cache_home, 'termclock', 'fonts', f'{name}.atlas')
+
+    @classmethod
+    def load_cached(cls, name, stat, digest=None):
+        """Load an atlas from the cache if it matches the font file"""
+        try:
+            with open(cls.cache_path(name), 'rb') as f:
+                version, mtime_ns, size, cached_digest, width, height, items = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None, None
+        if version != cls.CACHE_VERSION:
+            return None, None
+        # The mtime and size are enough to trust the cache; otherwise the
+        # caller re-reads the file and we compare content hashes instead
+        if digest is None and (mtime_ns, size) != (stat.st_mtime_ns, stat.st_size):
+            return None, cached_digest
+        if digest is not None and digest != cached_digest:
+            return None, cached_digest
+        return cls(name, dict(items), width, height), cached_digest
+
+    def save_cached(self, stat, digest):
+        """Write the atlas to the cache, ignoring failures"""
+        path = self.cache_path(self.name)
+        record = (self.CACHE_VERSION, stat.st_mtime_ns, stat.st_size, digest,
+                  self.width, self.height, tuple(self.glyphs.items()))
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                marshal.dump(record, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+
+class StrokeFont:
+    """Digits, colon and AM/PM drawn procedurally from strokes at sub-cell resolution"""
+
+    # Seven-segment strokes on a 1 x 2 box, y growing downwards
+    SEGMENTS = {
+        'a': ((0, 0), (1, 0)),
+        'b': ((1, 0), (1, 1)),
+        'c': ((1, 1), (1, 2)),
+        'd': ((0, 2), (1, 2)),
+        'e': ((0, 1), (0, 2)),
+        'f': ((0, 0), (0, 1)),
+        'g': ((0, 1), (1, 1))
+    }
+    DIGITS = {
+        '0': 'abcdef', '1': 'bc', '2': 'abdeg', '3': 'abcdg', '4': 'bcfg',
+        '5': 'acdfg', '6': 'acdefg', '7': 'abc', '8': 'abcdefg', '9': 'abcdfg',
+        'A': 'abcefg', 'P': 'abefg'
+    }
+    OTHER_STROKES = {
+        ':': (((0.5, 0.6), (0.5, 0.6)), ((0.5, 1.4), (0.5, 1.4))),
+        '.': (((0.5, 1.8), (0.5, 1.8)),),
+        'M': (((0, 2), (0, 0)), ((0, 0), (0.5, 1)), ((0.5, 1), (1, 0)), ((1, 0), (1, 2)))
+    }
+    # Mode -> sub-cell pixels per character cell (columns, rows)
+    MODES = {
+        'half': (1, 2),
+        'braille': (2, 4),
+        'ascii': (1, 1)
+    }
+    HALF_BLOCKS = ' ▀▄█'
+    # Braille character for each 2 x 4 cell, indexed by its four 2-bit pixel
+    # rows packed top to bottom (see encode())
+    BRAILLE = tuple(
+        chr(0x2800 + sum(dot for bit, dot in enumerate((0x01, 0x08, 0x02, 0x10, 0x04, 0x20, 0x40, 0x80))
+                         if index >> bit & 1)) if index else ' '
+        for index in range(256)
+    )
+
+    def __init__(self, name, mode, thickness, width=5, height=5):
+        self.name = name
+        self.mode = mode
+        self.thickness = thickness  # Stroke width as a fraction of the ink width
+        self.width = width  # Cells per glyph at scale 1, one of them spacing
+        self.height = height
+        self.atlases = {}  # Scale -> GlyphAtlas, rasterized once per size
+
+    def strokes(self, char):
+        """Line segments of a character on the 1 x 2 box"""
+        if char in self.DIGITS:
+            return [self.SEGMENTS[segment] for segment in self.DIGITS[char]]
+        return self.OTHER_STROKES.get(char, ())
+
+    def rasterize(self, char, pixel_width, pixel_height, thickness):
+        """Draw a character's strokes into rows of pixels packed as bit masks"""
+        rows = [0] * pixel_height
+        span_x = pixel_width - thickness
+        span_y = pixel_height - thickness
+        stamp = (1 << thickness) - 1
+        for (x0, y0), (x1, y1) in self.strokes(char):
+            x0, x1 = x0 * span_x, x1 * span_x
+            y0, y1 = y0 / 2 * span_y, y1 / 2 * span_y
+            if x0 == x1 or y0 == y1:
+                # Straight strokes (and dots) fill one rectangle
+                left = int(round(min(x0, x1)))
+                top = int(round(min(y0, y1)))
+                mask = ((1 << (int(round(max(x0, x1))) - left + thickness)) - 1) << left
+                for row in range(top, int(round(max(y0, y1))) + thickness):
+                    rows[row] |= mask
+                continue
+            steps = int(max(abs(x1 - x0), abs(y1 - y0)) * 2) + 1
+            for i in range(steps + 1):
+                t = i / steps
+                x = int(round(x0 + (x1 - x0) * t))
+                y = int(round(y0 + (y1 - y0) * t))
+                # A thickness x thickness square of ink at each point
+                for row in range(y, y + thickness):
+                    rows[row] |= stamp << x
+        return rows
+
+    def encode(self, rows, width, height):
+        """Turn pixel rows into the characters of each cell"""
+        if self.mode == 'ascii':
+            return tuple(''.join('#' if bits >> x & 1 else ' ' for x in range(width)) for bits in rows)
+        if self.mode == 'half':
+            blocks = self.HALF_BLOCKS
+            return tuple(
+                ''.join(blocks[(top >> x & 1) | (bottom >> x & 1) << 1] for x in range(width))
+                for top, bottom in zip(rows[0::2], rows[1::2])
+            )
+        braille = self.BRAILLE
+        lines = []
+        for r in range(height):
+            p0, p1, p2, p3 = rows[r * 4:r * 4 + 4]
+            lines.append(''.join(
+                braille[(p0 >> x & 3) | (p1 >> x & 3) << 2 | (p2 >> x & 3) << 4 | (p3 >> x & 3) << 6]
+                for x in range(0, width * 2, 2)
+            ))
+        return tuple(lines)
+
+    def atlas(self, scale=1):
+        """The font rasterized for a scale, built once per scale"""
+        atlas = self.atlases.get(scale)
+        if atlas is not None:
+            return atlas
+        if len(self.atlases) >= 8:
+            # Keep only the unscaled glyphs once many sizes have been seen
+            self.atlases = {1: self.atlases[1]} if 1 in self.atlases else {}
+        width = -(-int(self.width * scale * 2) // 2)
+        height = -(-int(self.height * scale * 2) // 2)
+        per_x, per_y = self.MODES[self.mode]
+        # The last cell column is spacing between glyphs
+        ink_width = (width - 1) * per_x
+        pixel_height = height * per_y
+        thickness = max(1, int(round(ink_width * self.thickness)))
+        glyphs = {}
+        for char in list(self.DIGITS) + list(self.OTHER_STROKES):
+            rows = self.rasterize(char, ink_width, pixel_height, thickness)
+            glyphs[char] = self.encode(rows, width, height)
+        atlas = GlyphAtlas(self.name, glyphs, width, height, scale, rasterizer=self)
+        self.atlases[scale] = atlas
+        return atlas
+
+
+# Fonts drawn by StrokeFont when there is no .font file for them
+STROKE_FONTS = {
+    'digital': StrokeFont('digital', 'half', 0.2),
+    'slim': StrokeFont('slim', 'half', 0.1, width=4),
+    'braille': StrokeFont('braille', 'braille', 0.12),
+    'ascii': StrokeFont('ascii', 'ascii', 0.2)
+}
+
+
+class Layout:
+    """Screen positions of the clock, date and info panel for one terminal size"""
+
+    SPACE_WIDTH = 2   # Columns taken by a space in the time string
+    INFO_WIDTH = 25   # Columns reserved for the info panel
+    INFO_ROW = 2
+
+    def __init__(self, key, lines, cols, font, time_str, top=0, bottom=None):
+        self.key = key
+        self.font = font  # Atlas the clock is drawn with, scaled to the screen
+        self.show_seconds = True
+        self.compact = False
+
+        # Degrade step by step until the clock fits: drop the seconds, then
+        # fall back to a single line of plain text
+        text = time_str
+        if not self.fits(text, font, lines, cols):
+            self.show_seconds = False
+            text = self.drop_seconds(time_str)
+        if not self.fits(text, font, lines, cols):
+            self.compact = True
+            self.show_seconds = len(time_str) <= cols
+            text = time_str if self.show_seconds else self.drop_seconds(time_str)
+
+        if self.compact:
+            self.width = len(text)
+            self.height = 1
+            self.positions = [None] * len(text)
+        else:
+            self.width = self.text_width(text, font)
+            self.height = font.height
+        self.start_x = max(0, (cols - self.width) // 2)
+        self.start_y = top + max(0, (lines - self.height) // 2)
+
+        if not self.compact:
+            # Column of each glyph in the time string (None for spaces)
+            self.positions = []
+            x = self.start_x
+            for char in text:
+                if char == ' ':
+                    self.positions.append(None)
+                    x += self.SPACE_WIDTH
+                else:
+                    self.positions.append(x)
+                    x += font.width
+
+        self.date_y = self.start_y + self.height + 1  # Below the clock
+        if self.date_y >= (bottom if bottom is not None else top + lines):
+            self.date_y = None
+        self.info_x = cols - self.INFO_WIDTH  # Top right corner
+        self.info_rows = max(0, lines - self.INFO_ROW) if self.info_x > 0 else 0
+
+    @classmethod
+    def text_width(cls, text, font):
+        """Columns needed to draw a time string in big digits"""
+        spaces = text.count(' ')
+        return spaces * cls.SPACE_WIDTH + (len(text) - spaces) * font.width
+
+    @classmethod
+    def fits(cls, text, font, lines, cols):
+        """Whether a time string fits on screen in big digits"""
+        return cls.text_width(text, font) <= cols and font.height <= lines
+
+    @staticmethod
+    def drop_seconds(time_str):
+        """Strip the seconds (and any hundredths) from a HH:MM:SS[.cc][ AM] string"""
+        if time_str[5:6] != ':':
+            return time_str  # Already without seconds
+        if time_str[8:9] == '.':
+            return time_str[:5] + time_str[11:]
+        return time_str[:5] + time_str[8:]
+
+
+class ZoneClock:
+    """One time zone of the world clock, with its UTC offset cached until the next change"""
+
+    TRANSITION_STEP = 7 * 86400  # Scan ahead a week at a time for offset changes
+    TRANSITION_HORIZON = 400 * 86400
+
+    def __init__(self, name):
+        self.name = name
+        self.label = name.rsplit('/', 1)[-1].replace('_', ' ')
+        self.tz = self.load_zone(name)
+        self.offset = 0
+        self.valid_from = None  # The cached offset applies in [valid_from, valid_until)
+        self.valid_until = None
+        self.offset_str = ""
+        self._key = None
+        self._time_str = ""
+
+    @staticmethod
+    def load_zone(name):
+        """Look up a tzinfo for a zone name"""
+        from datetime import timezone
+        if name.upper() in ('UTC', 'GMT', 'Z'):
+            return timezone.utc
+        try:
+            from zoneinfo import ZoneInfo
+        except ImportError:
+            raise ValueError(f"time zone {name!r} needs Python 3.9+ (zoneinfo)")
+        try:
+            return ZoneInfo(name)
+        except Exception:
+            raise ValueError(f"unknown time zone {name!r}")
+
+    def offset_at(self, timestamp):
+        """UTC offset in seconds at a given time"""
+        from datetime import datetime
+        return int(datetime.fromtimestamp(timestamp, self.tz).utcoffset().total_seconds())
+
+    def utc_offset(self, timestamp):
+        """UTC offset at a given time, recomputed only after the next transition"""
+        if self.valid_from is not None and self.valid_from <= timestamp < self.valid_until:
+            return self.offset
+        self.offset = self.offset_at(timestamp)
+        self.valid_from = timestamp
+        self.valid_until = self.next_transition(timestamp)
+        self.offset_str = self.offset_string()
+        return self.offset
+
+    def next_transition(self, timestamp):
+        """Find when the offset next changes (or a horizon if it doesn't soon)"""
+        low = timestamp
+        while low - timestamp < self.TRANSITION_HORIZON:
+            high = low + self.TRANSITION_STEP
+            if self.offset_at(high) != self.offset:
+                # Bisect down to the second the offset changes
+                while high - low > 1:
+                    middle = (low + high) // 2
+                    if self.offset_at(middle) == self.offset:
+                        low = middle
+                    else:
+                        high = middle
+                return high
+            low = high
+        return low
+
+    def time_string(self, second, format_24h, seconds=True):
+        """Time in this zone for a UTC second, formatted once per second"""
+        key = (second, format_24h, seconds)
+        if key != self._key:
+            local = time.gmtime(second + self.utc_offset(second))
+            self._time_str = time.strftime(time_format(format_24h, seconds), local)
+            self._key = key
+        return self._time_str
+
+    def offset_string(self):
+        """The current UTC offset as UTC+HH:MM"""
+        sign = '+' if self.offset >= 0 else '-'
+        hours, minutes = divmod(abs(self.offset) // 60, 60)
+        return f"UTC{sign}{hours:02d}:{minutes:02d}"
+
+
+class WorldClock:
+    """Clocks for several time zones, drawn below the main clock on its tick"""
+
+    TILE_GAP = 4  # Columns between big-digit tiles
+    ROW_WIDTH = 38  # Columns per compact row
+
+    def __init__(self, zone_names):
+        self.zones = [ZoneClock(name) for name in zone_names]
+        self.key = None
+        self.tiled = False
+        self.reserved = 0
+        self.top = 0  # First screen row of the panel
+        self.positions = []  # (y, x) of each zone's tile or row, relative to the panel
+        self._rows_cache = {}  # (font, time string) -> tile rows
+
+    def plan(self, lines, cols, font, format_24h, main_rows, seconds=True):
+        """Choose between big-digit tiles and compact rows; return the rows reserved"""
+        key = (lines, cols, font.name, format_24h, main_rows, seconds)
+        if key == self.key:
+            return self.reserved
+        self.key = key
+        self._rows_cache = {}
+        count = len(self.zones)
+        sample = time.strftime(time_format(format_24h, seconds), time.gmtime(0))
+
+        # Big digits: a label row, the glyphs and a blank row per tile
+        tile_width = Layout.text_width(sample, font) + self.TILE_GAP
+        tile_height = font.height + 2
+        per_row = max(1, cols // tile_width)
+        tile_rows = -(-count // per_row)
+        self.tiled = tile_width <= cols and main_rows + tile_rows * tile_height + 1 <= lines
+        if self.tiled:
+            self.reserved = tile_rows * tile_height + 1
+            item_width, item_height = tile_width, tile_height
+            shown = count
+        else:
+            per_row = max(1, cols // self.ROW_WIDTH)
+            rows = min(-(-count // per_row), max(0, lines - main_rows - 1))
+            self.reserved = rows + 1 if rows else 0
+            item_width, item_height = self.ROW_WIDTH, 1
+            # Only the zones in the reserved rows; none if there is no room
+            shown = min(count, rows * per_row)
+
+        self.positions = []
+        for i in range(shown):
+            row, column = divmod(i, per_row)
+            in_row = min(per_row, shown - row * per_row)
+            left = max(0, (cols - in_row * item_width) // 2)
+            self.positions.append((row * item_height, left + column * item_width))
+        return self.reserved
+
+    def tile_rows(self, font, time_str):
+        """Big-digit rows for a time string, joined once per second"""
+        key = (font.name, time_str)
+        rows = self._rows_cache.get(key)
+        if rows is None:
+            rows = []
+            for r in range(font.height):
+                rows.append(''.join(
+                    ' ' * Layout.SPACE_WIDTH if char == ' ' else font.glyph(char)[r]
+                    for char in time_str
+                ))
+            if len(self._rows_cache) > 4 * len(self.zones):
+                self._rows_cache = {}
+            self._rows_cache[key] = rows
+        return rows
+
+    def draw(self, renderer, top, lines, font, second, format_24h, seconds, attr, label_attr):
+        """Queue every zone for the frame, one span per row"""
+        for zone, (y, x) in zip(self.zones, self.positions):
+            y += top
+            if y >= lines:
+                break
+            time_str = zone.time_string(second, format_24h, seconds)
+            if not self.tiled:
+                renderer.put(y, x, f"{zone.label[:12]:<12} {time_str:<11} {zone.offset_str}", attr)
+                continue
+            renderer.put(y, x, f"{zone.label} ({zone.offset_str})", label_attr)
+            for r, row in enumerate(self.tile_rows(font, time_str)):
+                if y + 1 + r < lines:
+                    renderer.put(y + 1 + r, x, row, attr)
+
+
+def parse_duration(text):
+    """Parse a duration such as 90, 45s, 25m, 1h30m or 1:30:00 into nanoseconds"""
+    text = text.strip().lower()
+    try:
+        if ':' in text:
+            parts = text.split(':')
+            if len(parts) > 3:
+                raise ValueError
+            seconds = 0.0
+            for part in parts:
+                seconds = seconds * 60 + float(part)
+        elif text[-1:] in ('h', 'm', 's'):
+            import re
+            match = re.fullmatch(r'(?:([\d.]+)h)?(?:([\d.]+)m)?(?:([\d.]+)s)?', text)
+            if match is None:
+                raise ValueError
+            hours, minutes, secs = (float(group or 0) for group in match.groups())
+            seconds = hours * 3600 + minutes * 60 + secs
+        else:
+            seconds = float(text)
+    except ValueError:
+        raise ValueError(f"expected a duration like 90, 45s, 25m, 1h30m or 1:30:00, got {text!r}") from None
+    if not 0 < seconds < 100 * 3600:
+        raise ValueError(f"expected a duration between 0 and 100 hours, got {text!r}")
+    return int(round(seconds * 1e9))
+
+
+def timer_spec(text):
+    """Parse a --timer NAME[=DURATION] into (name, nanoseconds or None for a stopwatch)"""
+    name, sep, duration = text.partition('=')
+    name = name.strip()
+    if not name:
+        raise ValueError(f"expected NAME or NAME=DURATION, got {text!r}")
+    return (name, parse_duration(duration) if sep else None)
+
+
+def boot_id():
+    """Identifier of the current boot, or None where the system doesn't provide one"""
+    try:
+        with open('/proc/sys/kernel/random/boot_id') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+class Timer:
+    """A stopwatch, or a countdown when given a duration, on the monotonic clock"""
+
+    def __init__(self, name, duration_ns=None):
+        self.name = name
+        self.duration_ns = duration_ns  # None for a stopwatch
+        self.elapsed_ns = 0  # Run time before the current start
+        self.started_ns = None  # time.monotonic_ns() at the last start, while running
+        self.steps = None  # Displayed value in display units, as of the last update()
+        self.text = ""
+        self.row = ""
+
+    @property
+    def running(self):
+        return self.started_ns is not None
+
+    def elapsed(self, now_ns):
+        """Nanoseconds the timer has run"""
+        if self.started_ns is None:
+            return self.elapsed_ns
+        return self.elapsed_ns + now_ns - self.started_ns
+
+    def start(self, now_ns):
+        """Start or resume"""
+        if self.started_ns is None and not self.done(now_ns):
+            self.started_ns = now_ns
+            self.steps = None
+
+    def pause(self, now_ns):
+        """Stop, keeping the time run so far"""
+        if self.started_ns is not None:
+            self.elapsed_ns = self.elapsed(now_ns)
+            self.started_ns = None
+            self.steps = None
+
+    def reset(self):
+        """Back to zero (or the full duration), stopped"""
+        self.elapsed_ns = 0
+        self.started_ns = None
+        self.steps = None
+
+    def done(self, now_ns):
+        """Whether a countdown has reached zero"""
+        return self.duration_ns is not None and self.elapsed(now_ns) >= self.duration_ns
+
+    def update(self, now_ns, unit, centis):
+        """Refresh the text for this frame, returning whether it changed"""
+        if self.duration_ns is None:
+            steps = self.elapsed(now_ns) // unit
+        else:
+            # Count down by rounding up, so zero shows only once time is up
+            steps = -(-max(0, self.duration_ns - self.elapsed(now_ns)) // unit)
+            if steps == 0 and self.started_ns is not None:
+                self.pause(now_ns)
+        if steps == self.steps:
+            return False
+        self.steps = steps
+        seconds, hundredths = divmod(steps, 100) if centis else (steps, 0)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        self.text = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+        if centis:
+            self.text += f".{hundredths:02d}"
+        state = 'running' if self.running else 'done' if self.done(now_ns) else 'paused'
+        self.row = f"{self.name[:14]:<14} {self.text:>11} {state:<7}"
+        return True
+
+    def next_change(self, now_ns, unit):
+        """Nanoseconds until the displayed value next changes, or None while stopped"""
+        if self.started_ns is None:
+            return None
+        elapsed = self.elapsed(now_ns)
+        if self.duration_ns is None:
+            return unit - elapsed % unit
+        return (self.duration_ns - elapsed) % unit or unit
+
+    def state(self, now_ns, wall_ns):
+        """Saved form of the timer; a running one records its start on both clocks"""
+        started_wall_ns = None
+        if self.started_ns is not None:
+            started_wall_ns = wall_ns - (now_ns - self.started_ns)
+        return {
+            'name': self.name,
+            'duration_ns': self.duration_ns,
+            'elapsed_ns': self.elapsed_ns,
+            'started_ns': self.started_ns,
+            'started_wall_ns': started_wall_ns
+        }
+
+    def restore(self, state, now_ns, wall_ns, same_boot):
+        """Continue from a saved state"""
+        self.elapsed_ns = state['elapsed_ns']
+        self.started_ns = None
+        if state['started_ns'] is not None:
+            if same_boot:
+                # The monotonic clock kept counting, so this is exact
+                self.started_ns = state['started_ns']
+            else:
+                self.started_ns = now_ns - max(0, wall_ns - state['started_wall_ns'])
+        self.steps = None
+
+
+class TimerBoard:
+    """Stopwatches and countdowns shown instead of the time, saved across restarts"""
+
+    ROW_WIDTH = 38  # Columns per row of the timer list
+
+    def __init__(self, timers, path=None, centis=False):
+        self.timers = timers
+        self.selected = 0  # Timer shown in big digits, and the one keys act on
+        self.path = path  # Where timer state is saved
+        self.centis = centis
+        self.unit = 10_000_000 if centis else 1_000_000_000  # Nanoseconds per displayed step
+        self.dirty = True  # Some timer's text changed in the last update()
+        self.key = None
+        self.reserved = 0
+        self.top = 0  # First screen row of the list
+        self.positions = []  # (y, x) of each timer's row, relative to the list
+
+    @staticmethod
+    def state_path():
+        """Default location of the saved timer state"""
+        state_home = os.environ.get('XDG_STATE_HOME') or os.path.expanduser('~/.local/state')
+        return os.path.join(state_home, 'termclock', 'timers.json')
+
+    @classmethod
+    def load(cls, specs, path, centis=False):
+        """Timers for (name, duration) specs, resuming any saved with the same name and duration"""
+        import json
+        timers = [Timer(name, duration_ns) for name, duration_ns in specs]
+        board = cls(timers, path, centis)
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+            states = {(state['name'], state['duration_ns']): state for state in saved['timers']}
+        except (OSError, ValueError, KeyError, TypeError):
+            saved, states = {}, {}
+        
+        now_ns = time.monotonic_ns()
+        wall_ns = time.time_ns()
+        same_boot = saved.get('boot_id') is not None and saved.get('boot_id') == boot_id()
+        for timer in timers:
+            state = states.get((timer.name, timer.duration_ns))
+            if state is not None:
+                try:
+                    timer.restore(state, now_ns, wall_ns, same_boot)
+                    continue
+                except (KeyError, TypeError):
+                    pass
+            timer.start(now_ns)  # New timers start right away
+        names = [timer.name for timer in timers]
+        if saved.get('selected') in names:
+            board.selected = names.index(saved['selected'])
+        board.save()
+        return board
+
+    def save(self):
+        """Write every timer's state, replacing the file in one step"""
+        if self.path is None:
+            return
+        import json
+        now_ns = time.monotonic_ns()
+        wall_ns = time.time_ns()
+        state = {
+            'boot_id': boot_id(),
+            'selected': self.timers[self.selected].name,
+            'timers': [timer.state(now_ns, wall_ns) for timer in self.timers]
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # Timers keep running; they just won't resume after a restart
+
+    @property
+    def current(self):
+        return self.timers[self.selected]
+
+    def update(self, now_ns):
+        """Refresh every timer's text for this frame, returning the selected one's"""
+        unit = self.unit
+        centis = self.centis
+        self.dirty = False
+        for timer in self.timers:
+            if timer.update(now_ns, unit, centis):
+                self.dirty = True
+        return self.current.text
+
+    def running(self):
+        """Whether any timer is running"""
+        return any(timer.started_ns is not None for timer in self.timers)
+
+    def next_change(self, now_ns):
+        """Seconds until any displayed value changes, or None while all are stopped"""
+        waits = [timer.next_change(now_ns, self.unit) for timer in self.timers if timer.started_ns is not None]
+        return min(waits) / 1e9 if waits else None
+
+    def toggle(self, now_ns):
+        """Start or pause the selected timer"""
+        timer = self.current
+        if timer.running:
+            timer.pause(now_ns)
+        else:
+            timer.start(now_ns)
+        self.save()
+
+    def reset(self):
+        """Reset the selected timer"""
+        self.current.reset()
+        self.save()
+
+    def select_next(self):
+        """Show the next timer in big digits"""
+        self.selected = (self.selected + 1) % len(self.timers)
+        self.save()
+
+    def plan(self, lines, cols, main_rows):
+        """Lay out one row per timer below the main clock; return the rows reserved"""
+        key = (lines, cols, main_rows)
+        if key == self.key:
+            return self.reserved
+        self.key = key
+        count = len(self.timers)
+        per_row = max(1, cols // self.ROW_WIDTH)
+        rows = min(-(-count // per_row), max(0, lines - main_rows - 1))
+        self.reserved = rows + 1 if rows else 0
+        self.positions = []
+        for i in range(min(count, rows * per_row)):
+            row, column = divmod(i, per_row)
+            in_row = min(per_row, count - row * per_row)
+            left = max(0, (cols - in_row * self.ROW_WIDTH) // 2)
+            self.positions.append((row, left + column * self.ROW_WIDTH))
+        return self.reserved
+
+    def draw(self, renderer, lines, attr, selected_attr):
+        """Queue a row per timer, the selected one highlighted"""
+        for i, (timer, (y, x)) in enumerate(zip(self.timers, self.positions)):
+            y += self.top
+            if y >= lines:
+                break
+            if i == self.selected:
+                renderer.put(y, x, '> ' + timer.row, selected_attr)
+            else:
+                renderer.put(y, x, '  ' + timer.row, attr)
+
+
+def fade_rows(old_rows, new_rows, progress, atlas):
+    """Fade transition: old ink gives way to new ink around the midpoint"""
+    if progress <= 0.3:
+        return old_rows
+    ink = atlas.ink
+    spread = atlas.spread
+    result = []
+    for old, new in zip(old_rows, new_rows):
+        select = ink(new)
+        if progress < 0.5:
+            # New ink only shows through where the old glyph has none yet
+            select &= ~ink(old)
+        select = spread(select)
+        result.append(old & ~select | new & select)
+    return tuple(result)
+
+
+def slide_down_rows(old_rows, new_rows, progress, atlas):
+    """Slide transition: the new glyph pushes the old one down"""
+    offset = int(round(progress * len(old_rows)))
+    return tuple(new_rows[len(new_rows) - offset:]) + tuple(old_rows[:len(old_rows) - offset])
+
+
+def roll_rows(old_rows, new_rows, progress, atlas):
+    """Roll transition: the old glyph scrolls up and out like an odometer"""
+    offset = int(round(progress * len(old_rows)))
+    return tuple(old_rows[offset:]) + tuple(new_rows[:offset])
+
+
+DISSOLVE_MASKS = {}  # (width, height, depth, progress) -> per row, the cells switched to the new glyph
+
+
+def dissolve_rows(old_rows, new_rows, progress, atlas):
+    """Dissolve transition: cells switch to the new glyph in a scattered order"""
+    key = (atlas.width, len(old_rows), atlas.depth, progress)
+    selects = DISSOLVE_MASKS.get(key)
+    if selects is None:
+        # Fixed per-cell thresholds spread evenly over 0..1
+        selects = DISSOLVE_MASKS[key] = tuple(
+            atlas.spread(sum(1 << c for c in range(atlas.width) if ((r * 7 + c * 3) % 10) / 10.0 < progress))
+            for r in range(len(old_rows))
+        )
+    return tuple(old & ~select | new & select for old, new, select in zip(old_rows, new_rows, selects))
+
+
+# Transition style name -> function(old_rows, new_rows, progress, atlas) -> rows,
+# with glyphs as rows of bit planes (see GlyphAtlas.bits())
+TRANSITION_STYLES = {
+    'fade': fade_rows,
+    'slide-down': slide_down_rows,
+    'roll': roll_rows,
+    'dissolve': dissolve_rows
+}
+
+
+class TransitionTable:
+    """Every animation frame between each pair of a font's glyphs, precomputed"""
+
+    STEPS = 10  # Frames per transition (progress advances 0.1 per frame)
+
+    def __init__(self, atlas, style, base=None):
+        self.atlas = atlas
+        self.blend = TRANSITION_STYLES[style]
+        self.frames = {}  # (old char, new char) -> tuple of STEPS frames
+        # A scaled atlas enlarges the unscaled table's frames, one transition
+        # at a time on first use, instead of blending large glyphs
+        self.base = base
+        if base is None:
+            chars = GlyphAtlas.REQUIRED_CHARS
+            for old in chars:
+                for new in chars:
+                    self.build(old, new)
+
+    def build(self, old_char, new_char):
+        """Compute and keep every frame of one transition"""
+        if self.base is not None:
+            base_frames = self.base.frames.get((old_char, new_char)) or self.base.build(old_char, new_char)
+            base_atlas = self.base.atlas
+            frames = tuple(base_atlas.scale_rows(rows, self.atlas.scale) for rows in base_frames)
+            self.frames[(old_char, new_char)] = frames
+            return frames
+        atlas = self.atlas
+        old_bits = atlas.bits(old_char)
+        new_bits = atlas.bits(new_char)
+        blend = self.blend
+        frames = tuple(atlas.rows(blend(old_bits, new_bits, step / self.STEPS, atlas))
+                       for step in range(self.STEPS))
+        self.frames[(old_char, new_char)] = frames
+        return frames
+
+    def frame(self, old_char, new_char, progress):
+        """Look up the rows for a transition at the given progress"""
+        step = min(self.STEPS - 1, max(0, int(round(progress * self.STEPS))))
+        frames = self.frames.get((old_char, new_char))
+        if frames is None:
+            if old_char not in GlyphAtlas.REQUIRED_CHARS or new_char not in GlyphAtlas.REQUIRED_CHARS:
+                # Characters outside the table (e.g. AM/PM) are rare; blend directly
+                atlas = self.atlas
+                return atlas.rows(self.blend(atlas.bits(old_char), atlas.bits(new_char),
+                                             step / self.STEPS, atlas))
+            frames = self.build(old_char, new_char)
+        return frames[step]
+
+
+class FrameProfiler:
+    """Time each stage of the main loop and keep rolling statistics"""
+
+    STAGES = ('input', 'clock', 'date', 'info', 'refresh', 'sleep')
+    WINDOW = 512  # Samples kept per stage
+    # Histogram bucket upper bounds in milliseconds
+    BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 50.0, 100.0)
+    MISS_THRESHOLD = 0.005  # Seconds late before a deadline counts as missed
+
+    def __init__(self, log_path=None, log_interval=10.0):
+        self.samples = {stage: deque(maxlen=self.WINDOW) for stage in self.STAGES}
+        self.frame_times = deque(maxlen=self.WINDOW)
+        self.frames = 0
+        self.wakeups = 0
+        self.missed = 0
+        self.worst_lateness = 0.0
+        self.started = time.monotonic()
+        self.log_path = log_path
+        self.log_interval = log_interval
+        self.next_log = self.started + log_interval
+        self.overlay = ""
+        self.next_overlay = 0.0
+        self.sampler_cost = {}  # Metric -> seconds its latest background sample took
+
+    def record(self, stage, seconds):
+        """Record how long one stage took"""
+        self.samples[stage].append(seconds)
+
+    def frame_done(self):
+        """Count a drawn frame"""
+        self.frames += 1
+        self.frame_times.append(time.monotonic())
+
+    def deadline_reached(self, lateness):
+        """Record how late the loop woke up for a frame deadline"""
+        if lateness > self.MISS_THRESHOLD:
+            self.missed += 1
+        self.worst_lateness = max(self.worst_lateness, lateness)
+        now = time.monotonic()
+        if self.log_path and now >= self.next_log:
+            self.write_log(final=False)
+            self.next_log = now + self.log_interval
+
+    def fps(self):
+        """Frames per second over the rolling window"""
+        if len(self.frame_times) < 2:
+            return 0.0
+        span = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / span if span > 0 else 0.0
+
+    def stage_stats(self, stage):
+        """Summary statistics for one stage, in milliseconds"""
+        samples = sorted(self.samples[stage])
+        if not samples:
+            return None
+        histogram = [0] * (len(self.BUCKETS) + 1)
+        for sample in samples:
+            ms = sample * 1000
+            for i, bound in enumerate(self.BUCKETS):
+                if ms < bound:
+                    histogram[i] += 1
+                    break
+            else:
+                histogram[-1] += 1
+        return {
+            'count': len(samples),
+            'p50_ms': round(samples[len(samples) // 2] * 1000, 3),
+            'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 3),
+            'max_ms': round(samples[-1] * 1000, 3),
+            'histogram': histogram
+        }
+
+    def slowest_stage(self):
+        """Work stage with the highest median time (sleep isn't work)"""
+        slowest = None
+        for stage in self.STAGES:
+            if stage == 'sleep' or not self.samples[stage]:
+                continue
+            median = sorted(self.samples[stage])[len(self.samples[stage]) // 2]
+            if slowest is None or median > slowest[1]:
+                slowest = (stage, median)
+        return slowest
+
+    def overlay_text(self):
+        """One-line status shown on screen, refreshed once a second"""
+        now = time.monotonic()
+        if now >= self.next_overlay:
+            slowest = self.slowest_stage()
+            slow_str = f"{slowest[0]} {slowest[1] * 1000:.2f}ms" if slowest else "-"
+            self.overlay = f"FPS {self.fps():.1f} | slowest: {slow_str} | missed: {self.missed}"
+            self.next_overlay = now + 1.0
+        return self.overlay
+
+    def summary(self):
+        """Everything recorded so far, as a JSON-serialisable dict"""
+        return {
+            'time': time.time(),
+            'uptime_s': round(time.monotonic() - self.started, 3),
+            'frames': self.frames,
+            'fps': round(self.fps(), 2),
+            'wakeups_per_s': round(self.wakeups / max(1e-9, time.monotonic() - self.started), 3),
+            'missed_deadlines': self.missed,
+            'worst_lateness_ms': round(self.worst_lateness * 1000, 3),
+            'histogram_buckets_ms': list(self.BUCKETS),
+            'stages': {stage: self.stage_stats(stage) for stage in self.STAGES},
+            'sampler_ms': {metric: round(seconds * 1000, 3) for metric, seconds in self.sampler_cost.items()}
+        }
+
+    def write_log(self, final=True):
+        """Append the current summary to the log file as a JSON line"""
+        if not self.log_path:
+            return
+        record = self.summary()
+        record['final'] = final
+        try:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            import json
+            with open(self.log_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError:
+            pass
+
+
+class ConfigError(ValueError):
+    """A config file line that doesn't match the schema"""
+
+    def __init__(self, path, lineno, message, key=None):
+        super().__init__(f"{path}:{lineno}: {message}")
+        self.path = path
+        self.lineno = lineno
+        self.key = key
+
+
+class ConfigOption:
+    """One typed config key: its default and the values it accepts"""
+
+    TRUE = ('true', 'yes', 'on', '1')
+    FALSE = ('false', 'no', 'off', '0')
+
+    def __init__(self, default, kind=str, choices=None, minimum=None):
+        self.default = default
+        self.kind = kind
+        self.choices = choices
+        self.minimum = minimum
+
+    def parse(self, text):
+        """Convert a value from the config file, raising ValueError if it doesn't fit"""
+        if self.kind is bool:
+            lowered = text.lower()
+            if lowered in self.TRUE:
+                return True
+            if lowered in self.FALSE:
+                return False
+            raise ValueError(f"expected true or false, got {text!r}")
+        if self.kind in (int, float):
+            try:
+                value = self.kind(text)
+            except ValueError:
+                raise ValueError(f"expected a number, got {text!r}") from None
+            if self.minimum is not None and value < self.minimum:
+                raise ValueError(f"must be at least {self.minimum}, got {text}")
+            return value
+        if self.choices is not None and text not in self.choices:
+            raise ValueError(f"expected one of {', '.join(self.choices)}, got {text!r}")
+        if self.kind is not str:
+            return self.kind(text)
+        return text
+
+
+# Basic curses colors by name; 'default' is the terminal's own color
+NAMED_COLORS = {
+    'default': -1,
+    'black': 0,
+    'red': 1,
+    'green': 2,
+    'yellow': 3,
+    'blue': 4,
+    'magenta': 5,
+    'cyan': 6,
+    'white': 7
+}
+
+# RGB of the 16 standard colors, as xterm draws them
+ANSI_RGB = (
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0),
+    (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+    (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255)
+)
+CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+
+
+def parse_color(text):
+    """Parse a color name, 256-color index or #rrggbb into a color number or (r, g, b)"""
+    text = text.strip().lower()
+    if text in NAMED_COLORS:
+        return NAMED_COLORS[text]
+    if text.isdigit() and int(text) < 256:
+        return int(text)
+    if text.startswith('#') and len(text) == 7:
+        try:
+            value = int(text[1:], 16)
+        except ValueError:
+            pass
+        else:
+            return (value >> 16, (value >> 8) & 0xff, value & 0xff)
+    raise ValueError(f"expected a color name, 0-255 or #rrggbb, got {text!r}")
+
+
+def color_spec(text):
+    """Validate a color for the config, keeping it as text"""
+    parse_color(text)
+    return text.strip().lower()
+
+
+def color_rgb(index):
+    """RGB of a color in the xterm 256-color palette"""
+    if index < 16:
+        return ANSI_RGB[index]
+    if index < 232:
+        index -= 16
+        return (CUBE_LEVELS[index // 36], CUBE_LEVELS[index // 6 % 6], CUBE_LEVELS[index % 6])
+    gray = 8 + 10 * (index - 232)
+    return (gray, gray, gray)
+
+
+def resolve_color(spec, colors):
+    """Map a color to the nearest one a terminal with `colors` colors can show"""
+    value = parse_color(spec)
+    if colors >= 1 << 24:
+        # Direct color: numbers below 8 are still the ANSI colors
+        if isinstance(value, int):
+            if value < 8:
+                return value
+            value = color_rgb(value)
+        r, g, b = value
+        return (r << 16) | (g << 8) | b
+    if isinstance(value, int):
+        if value < colors:
+            return value
+        value = color_rgb(value)
+    r, g, b = value
+    return min(range(min(colors, 256)),
+               key=lambda i: sum((c - v) ** 2 for c, v in zip(color_rgb(i), (r, g, b))))
+
+
+class Theme:
+    """Colors of every screen element, from the config or a themes/*.theme file"""
+
+    ROLES = ('digits', 'colon', 'date', 'info', 'zones', 'labels', 'status')
+
+    def __init__(self, name, color='cyan', background='default', accent='white', **roles):
+        self.name = name
+        self.background = background
+        # color and accent fill in any element the theme doesn't name
+        self.colors = {role: color for role in self.ROLES}
+        self.colors['labels'] = accent
+        self.colors['status'] = accent
+        self.colors.update(roles)
+
+    @classmethod
+    def load(cls, path):
+        """Read a theme file, returning the theme and a list of ConfigErrors"""
+        values, errors = read_config(path, THEME_SCHEMA)
+        name = os.path.splitext(os.path.basename(path))[0]
+        return cls(name, **values), errors
+
+    def pairs(self):
+        """(foreground, background) of each role, in ROLES order"""
+        return [(self.colors[role], self.background) for role in self.ROLES]
+
+
+THEME_SCHEMA = {key: ConfigOption(None, color_spec) for key in ('color', 'background', 'accent') + Theme.ROLES}
+
+
+def scale_spec(text):
+    """Validate a glyph scale: 'auto', or a factor of at least 1 in half steps"""
+    text = text.strip().lower()
+    if text == 'auto':
+        return text
+    try:
+        value = float(text)
+    except ValueError:
+        raise ValueError(f"expected auto or a number, got {text!r}") from None
+    if value < 1 or value * 2 != int(value * 2):
+        raise ValueError(f"expected auto or 1, 1.5, 2, ..., got {text!r}")
+    return text
+
+
+def zones_spec(text):
+    """Validate a comma-separated list of time zones, returning it tidied"""
+    zones = [zone.strip() for zone in text.split(',') if zone.strip()]
+    for zone in zones:
+        ZoneClock.load_zone(zone)  # Raises ValueError for an unknown zone
+    return ','.join(zones)
+
+
+# Every key ~/.termclock.conf may set
+CONFIG_SCHEMA = {
+    'font': ConfigOption('block'),  # Unknown fonts fall back to the built-in one
+    'color': ConfigOption('cyan', color_spec),
+    'bg_color': ConfigOption('default', color_spec),
+    'theme': ConfigOption(''),  # Name of a themes/*.theme file; empty uses color and bg_color
+    'format': ConfigOption('24h', choices=('24h', '12h')),
+    'animation': ConfigOption(True, bool),
+    'transition': ConfigOption('fade', choices=tuple(TRANSITION_STYLES)),
+    'date': ConfigOption(False, bool),
+    'info': ConfigOption(False, bool),
+    'info_items': ConfigOption(INFO_ITEMS, info_spec),  # Info panel rows, e.g. cpu,net:eth0,disk:/data
+    'seconds': ConfigOption(True, bool),
+    'power_save': ConfigOption('auto', choices=('auto', 'on', 'off')),
+    'zones': ConfigOption('', zones_spec),
+    'scale': ConfigOption('1', scale_spec),  # Glyph size: a factor, or auto to fill the screen
+}
+# Sampling intervals in seconds; None keeps SystemSampler's default
+for _metric in SystemSampler.DEFAULT_INTERVALS:
+    CONFIG_SCHEMA[f'{_metric}_interval'] = ConfigOption(None, float, minimum=0.1)
+del _metric
+
+
+def read_config(path, schema=CONFIG_SCHEMA):
+    """Parse a key=value config file, returning the valid values and a list of ConfigErrors"""
+    values = {}
+    errors = []
+    with open(path, 'r') as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if '=' not in line:
+                errors.append(ConfigError(path, lineno, f"expected key=value, got {line!r}"))
+                continue
+            key, value = line.split('=', 1)
+            key = key.strip()
+            option = schema.get(key)
+            if option is None:
+                errors.append(ConfigError(path, lineno, f"unknown key {key!r}", key))
+                continue
+            try:
+                values[key] = option.parse(value.strip().strip('"\''))
+            except ValueError as e:
+                errors.append(ConfigError(path, lineno, f"{key}: {e}", key))
+    return values, errors
+
+
+class ConfigWatcher:
+    """Notice edits to the config file, through inotify where available"""
+
+    # inotify event masks (see inotify(7))
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_DELETE = 0x200
+    EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None  # inotify descriptor; None means poll the mtime instead
+        self.libc = None
+        self.watches = {}  # Watch descriptor -> names of interest in its directory
+        self.signature = self.stat()
+
+    def start(self):
+        """Start watching, returning the inotify descriptor or None if it must be polled"""
+        try:
+            import ctypes
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                return None
+        except (ImportError, OSError, AttributeError):
+            return None
+        self.fd = fd
+        self.libc = libc
+        if not self.add_watches():
+            self.stop()
+            return None
+        return fd
+
+    def add_watches(self):
+        """Watch the directories of the path and of the file it links to, returning whether any took"""
+        # Watch directories, since editors often replace the file by renaming.
+        # A symlinked config (as dotfile managers make) is edited in the
+        # target's directory, while repointing the link shows up in its own
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_DELETE
+        for path in (self.path, os.path.realpath(self.path)):
+            directory, name = os.path.split(path)
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory or '.'), mask)
+            if wd >= 0:
+                self.watches.setdefault(wd, set()).add(os.fsencode(name))
+        return bool(self.watches)
+
+    def stop(self):
+        """Stop watching"""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+            self.watches = {}
+
+    def stat(self):
+        """Identify the file's current version by mtime, size and inode"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def drain(self):
+        """Read pending inotify events, returning whether any were for the config file"""
+        seen = False
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return seen
+            if not data:
+                return seen
+            offset = 0
+            while offset < len(data):
+                wd, _, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                if data[offset:offset + length].rstrip(b'\0') in self.watches.get(wd, ()):
+                    seen = True
+                offset += length
+
+    def changed(self):
+        """Whether the file changed since the last call"""
+        if self.fd is not None and not self.drain():
+            return False
+        signature = self.stat()
+        if signature == self.signature:
+            return False
+        self.signature = signature
+        if self.fd is not None:
+            # The link may now point somewhere else
+            self.add_watches()
+        return True
+
+
 class TerminalClock:
-    def __init__(self):
+    def __init__(self, time_source=None):
         self.stdscr = None
+        self.backend = None
+        self.renderer = None
+        self.lines = 24  # Screen size as of the current frame
+        self.cols = 80
         self.running = True
         self.animation_enabled = True
         self.format_24h = True
         self.show_date = False
         self.show_info = False
+        self.show_seconds = True
+        self.power_save = "auto"  # off, on, or auto (on while running on battery)
+        self.low_power = False
+        self.next_power_check = 0.0
         self.current_font = "block"
         self.color = "cyan"
-        self.bg_color = "black"
+        self.bg_color = "default"
         self.font_data = {}
         self.config = {}
+        self.config_path = os.path.expanduser("~/.termclock.conf")
+        self.config_overrides = {}  # Values given on the command line
+        self.config_error = None  # First problem found in the config file or a font, shown on screen
+        self.config_watcher = None  # ConfigWatcher while running
+        self.config_pending = False  # inotify reported a change
+        
+        # System info sampling (started on first use)
+        self.sampler = None
+        self._info_snapshot = None
+        self._info_lines = None
+        
+        # Time is read once per frame; pass a TimeSource built on fake clocks
+        # to drive the clock with simulated time
+        self.time_source = time_source or TimeSource()
+        
+        # Frame pacing
+        self.scheduler = FrameScheduler(clock=self.time_source.time)
+        self.profiler = None  # FrameProfiler when running with --profile
+        self.stream_mode = None  # 'line' or 'block' with --stream
+        self.stream_plain = False
+        self.serve_address = None  # ('unix', path) or ('tcp', host, port) with --serve
+        self.connect_address = None  # Same, with --connect
+        self.bench_startup = False  # Exit after the first frame, reporting startup times
+        self.startup_marks = []  # (stage, time it finished), see mark_startup()
+        
+        # Event sources for the main loop (set up by init_events)
+        self.selector = None
+        self.wakeup_fds = None
+        self.resize_pending = False
         
         # Animation variables
         self.last_time_shown = ""
         self.transition_progress = 0.0  # 0.0 to 1.0
         self.is_transitioning = False
-        self.digit_positions = {}  # Store positions of digits for animation
+        self.transition_style = "fade"
+        self.transition_tables = {}  # (font, style) -> TransitionTable
+        self.layout = None  # Cached Layout, rebuilt on resize, font or format change
+        self.scale = "1"  # Glyph scale setting: a factor, or "auto"
+        self.scaled_fonts = {}  # (font, scale) -> scaled GlyphAtlas
+        self.display_font_key = None  # Inputs of the last scale choice
+        self.display_font = None
+        self.world_clock = None  # WorldClock when --zones is given
+        self.timer_specs = []  # (name, duration in ns or None) from --stopwatch, --countdown and --timer
+        self.centis = False  # Show timers' hundredths of a second
+        self.timers = None  # TimerBoard, shown instead of the time when timers are given
         
-        # Color mapping
-        self.colors = {
-            'black': curses.COLOR_BLACK,
-            'red': curses.COLOR_RED,
-            'green': curses.COLOR_GREEN,
-            'yellow': curses.COLOR_YELLOW,
-            'blue': curses.COLOR_BLUE,
-            'magenta': curses.COLOR_MAGENTA,
-            'cyan': curses.COLOR_CYAN,
-            'white': curses.COLOR_WHITE
-        }
+        # Themes; the first is built from the color and bg_color settings
+        self.themes = []
+        self.theme_index = 0
+        self.theme_attrs = []  # Per theme, role -> attribute, allocated once by attach()
+        
+        # Attributes of the active theme, one per screen element
+        self.digit_attr = 0
+        self.colon_attr = 0
+        self.date_attr = 0
+        self.info_attr = 0
+        self.zone_attr = 0
+        self.label_attr = 0
+        self.status_attr = 0
         
         # Load default configuration
         self.load_default_config()
         
     def load_default_config(self):
         """Load default configuration values"""
-        self.config = {
-            'font': 'block',
-            'color': 'cyan',
-            'bg_color': 'black',
-            'format': '24h',
-            'animation': True,
-            'date': False,
-            'info': False
-        }
+        self.config = {key: option.default for key, option in CONFIG_SCHEMA.items()}
+
+    def load_config_file(self, previous=None):
+        """Load configuration from ~/.termclock.conf on top of the defaults and command line"""
+        try:
+            values, errors = read_config(self.config_path)
+        except FileNotFoundError:
+            self.save_default_config()
+            values, errors = {}, []
+        except OSError as e:
+            values, errors = {}, [ConfigError(self.config_path, 0, e.strerror)]
+        
+        config = {key: option.default for key, option in CONFIG_SCHEMA.items()}
+        config.update(values)
+        if previous is not None:
+            # Keep the last good value of any key that failed to parse
+            for error in errors:
+                if error.key in previous:
+                    config[error.key] = previous[error.key]
+        config.update(self.config_overrides)
+        self.config = config
+        
+        self.config_error = None
+        if errors:
+            self.config_error = str(errors[0])
+            if len(errors) > 1:
+                self.config_error += f" (+{len(errors) - 1} more)"
+        return errors
 
-    def load_config_file(self):
-        """Load configuration from ~/.termclock.conf"""
-        config_path = os.path.expanduser("~/.termclock.conf")
-        if os.path.exists(config_path):
-            try:
-                with open(config_path, 'r') as f:
-                    for line in f:
-                        line = line.strip()
-                        if line and not line.startswith('#'):
-                            if '=' in line:
-                                key, value = line.split('=', 1)
-                                key = key.strip()
-                                value = value.strip().strip('"\'')
-                                
-                                # Convert string values to appropriate types
-                                if value.lower() in ['true', 'false']:
-                                    value = value.lower() == 'true'
-                                elif value.isdigit():
-                                    value = int(value)
-                                    
-                                self.config[key] = value
-            except Exception as e:
-                print(f"Error loading config file: {e}")
-                
     def save_default_config(self):
-        """Save default configuration to ~/.termclock.conf if it doesn't exist"""
-        config_path = os.path.expanduser("~/.termclock.conf")
-        if not os.path.exists(config_path):
-            default_config = """# termclock configuration file
+        """Save default configuration to ~/.termclock.conf"""
+        default_config = """# termclock configuration file
 font=block
 color=cyan
 format=24h
@@ -99,82 +2562,392 @@ animation=true
 date=false
 info=false
 """
-            try:
-                with open(config_path, 'w') as f:
-                    f.write(default_config)
-                print(f"Created default config file at {config_path}")
-            except Exception as e:
-                print(f"Error creating default config file: {e}")
+        try:
+            # 'x' fails instead of overwriting a file created meanwhile
+            with open(self.config_path, 'x') as f:
+                f.write(default_config)
+            # stderr, since stdout may be a --stream reader's data
+            print(f"Created default config file at {self.config_path}", file=sys.stderr)
+        except FileExistsError:
+            pass
+        except Exception as e:
+            print(f"Error creating default config file: {e}", file=sys.stderr)
 
-    def parse_arguments(self):
-        """Parse command line arguments"""
+    def build_parser(self):
+        """Build the command line parser"""
+        import argparse
         parser = argparse.ArgumentParser(description='A modern animated terminal clock')
         parser.add_argument('--font', help='Font to use (block, slim, digital, rounded, ascii, outline, star, braille, dots)')
-        parser.add_argument('--color', help='Main color (cyan, green, yellow, red, blue, magenta, white)')
-        parser.add_argument('--bg', help='Background color')
+        parser.add_argument('--color', type=color_spec,
+                            help='Main color (cyan, green, yellow, red, blue, magenta, white, 0-255 or #rrggbb)')
+        parser.add_argument('--bg', type=color_spec, help='Background color (default: the terminal\'s)')
+        parser.add_argument('--theme', help='Theme from the themes directory, e.g. dark or neon')
         parser.add_argument('--24h', dest='format_24h', action='store_true', help='Use 24-hour format')
         parser.add_argument('--12h', dest='format_12h', action='store_true', help='Use 12-hour format')
         parser.add_argument('--no-animation', action='store_true', help='Disable animations')
+        parser.add_argument('--no-seconds', action='store_true', help='Hide seconds and redraw once a minute')
+        parser.add_argument('--power-save', choices=['auto', 'on', 'off'],
+                            help='Low-power mode: no animation, redraw only on change (auto: on battery)')
+        parser.add_argument('--scale', type=scale_spec,
+                            help='Glyph size: a factor such as 2 or 2.5, or auto to fill the screen')
+        parser.add_argument('--transition', choices=list(TRANSITION_STYLES), help='Digit transition style')
         parser.add_argument('--date', action='store_true', help='Show date')
-        parser.add_argument('--info', action='store_true', help='Show system info')
+        parser.add_argument('--zones', type=zones_spec, help='Also show these time zones, e.g. UTC,America/New_York,Asia/Tokyo')
+        parser.add_argument('--info', nargs='?', const=True, metavar='ITEMS', type=info_spec,
+                            help='Show system info, optionally only these items, e.g. cpu,cpu:0,net:eth0,disk:/data')
+        parser.add_argument('--stopwatch', action='store_true', help='Show a stopwatch instead of the time')
+        parser.add_argument('--countdown', metavar='DURATION', type=parse_duration,
+                            help='Show a countdown instead of the time, e.g. 25m, 1h30m or 1:30:00')
+        parser.add_argument('--timer', metavar='NAME[=DURATION]', action='append', type=timer_spec,
+                            help='Add a named stopwatch, or countdown with a duration (repeatable)')
+        parser.add_argument('--centis', action='store_true', help='Show hundredths of a second on timers')
+        parser.add_argument('--stream', nargs='?', const='line', choices=['line', 'block'],
+                            help='Write to stdout instead of full screen: one line or a big-digit block per tick')
+        parser.add_argument('--plain', action='store_true', help='No escape codes in --stream output')
+        parser.add_argument('--serve', metavar='ADDRESS', type=parse_address,
+                            help='Run the clock once for many viewers on a Unix socket path or HOST:PORT')
+        parser.add_argument('--connect', metavar='ADDRESS', type=parse_address,
+                            help='Show the clock served by --serve at a Unix socket path or HOST:PORT')
+        parser.add_argument('--profile', action='store_true', help='Show frame timings and log them on exit')
+        parser.add_argument('--profile-log', metavar='FILE', help='Where --profile writes its JSON lines log')
+        parser.add_argument('--bench-startup', action='store_true',
+                            help='Show the first frame, then report how long each startup stage took')
         # Help is automatically provided by argparse, no need to define it manually
+        return parser
+
+    def parse_arguments(self, argv=None):
+        """Parse command line arguments"""
+        argv = sys.argv[1:] if argv is None else argv
+        parser = None
+        if argv:
+            # Without arguments there is nothing to parse, and argparse is
+            # one of the slower imports
+            parser = self.build_parser()
+            self.apply_arguments(parser.parse_args(argv))
         
-        args = parser.parse_args()
-        
-        # Override config with command line args
+        # Apply config to instance variables
+        try:
+            self.apply_config()
+        except ValueError as e:
+            (parser or self.build_parser()).error(str(e))
+
+    def apply_arguments(self, args):
+        """Apply parsed command line arguments on top of the config"""
+        # Override config with command line args; overrides also outlast reloads
+        overrides = self.config_overrides
         if args.font:
-            self.config['font'] = args.font
+            overrides['font'] = args.font
         if args.color:
-            self.config['color'] = args.color
+            overrides['color'] = args.color
         if args.bg:
-            self.config['bg_color'] = args.bg
+            overrides['bg_color'] = args.bg
+        if args.theme:
+            overrides['theme'] = args.theme
         if args.format_12h:
-            self.config['format'] = '12h'
+            overrides['format'] = '12h'
         elif args.format_24h:
-            self.config['format'] = '24h'
+            overrides['format'] = '24h'
         if args.no_animation:
-            self.config['animation'] = False
+            overrides['animation'] = False
+        if args.transition:
+            overrides['transition'] = args.transition
+        if args.scale:
+            overrides['scale'] = args.scale
+        if args.no_seconds:
+            overrides['seconds'] = False
+        if args.power_save:
+            overrides['power_save'] = args.power_save
         if args.date:
-            self.config['date'] = True
+            overrides['date'] = True
+        if args.zones:
+            overrides['zones'] = args.zones
         if args.info:
-            self.config['info'] = True
-            
-        # Apply config to instance variables
-        self.current_font = self.config['font']
-        self.color = self.config['color']
-        self.bg_color = self.config['bg_color']
-        self.animation_enabled = self.config['animation']
-        self.show_date = self.config['date']
-        self.show_info = self.config['info']
-        self.format_24h = self.config['format'] == '24h'
+            overrides['info'] = True
+            if args.info is not True:
+                overrides['info_items'] = args.info
+        self.config.update(overrides)
+        if args.stopwatch:
+            self.timer_specs.append(('stopwatch', None))
+        if args.countdown:
+            self.timer_specs.append(('countdown', args.countdown))
+        self.timer_specs.extend(args.timer or ())
+        self.centis = args.centis
+        self.stream_mode = args.stream
+        self.stream_plain = args.plain
+        self.serve_address = args.serve
+        self.connect_address = args.connect
+        self.bench_startup = args.bench_startup
+        if args.profile:
+            cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+            log_path = args.profile_log or os.path.join(cache_home, 'termclock', 'profile.jsonl')
+            self.profiler = FrameProfiler(log_path)
+
+    # Config key -> instance variable it is copied to
+    CONFIG_ATTRS = {
+        'font': 'current_font',
+        'color': 'color',
+        'bg_color': 'bg_color',
+        'animation': 'animation_enabled',
+        'transition': 'transition_style',
+        'date': 'show_date',
+        'info': 'show_info',
+        'seconds': 'show_seconds',
+        'power_save': 'power_save',
+        'scale': 'scale'
+    }
+
+    THEMES_DIRS = (
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'themes'),
+        os.path.expanduser('~/.config/termclock/themes')  # Installed by setup.py; wins by name
+    )
+
+    def load_themes(self):
+        """Load the built-in theme and every themes/*.theme file, returning any errors"""
+        themes = {}
+        errors = []
+        for directory in self.THEMES_DIRS:
+            try:
+                names = sorted(os.listdir(directory))
+            except OSError:
+                continue
+            for filename in names:
+                if filename.endswith('.theme'):
+                    try:
+                        theme, theme_errors = Theme.load(os.path.join(directory, filename))
+                    except OSError as e:
+                        errors.append(ConfigError(os.path.join(directory, filename), 0, e.strerror))
+                        continue
+                    themes[theme.name] = theme
+                    errors.extend(theme_errors)
+        custom = Theme('custom', self.color, self.bg_color)
+        self.themes = [custom] + sorted(themes.values(), key=lambda theme: theme.name)
+        self.theme_index = self.find_theme(self.config.get('theme', ''))
+        return errors
+
+    def find_theme(self, name):
+        """Index of the named theme, or 0 (the color settings) if it doesn't exist"""
+        for i, theme in enumerate(self.themes):
+            if theme.name == name:
+                return i
+        if name:
+            self.config_error = f"unknown theme {name!r}"
+        return 0
+
+    def init_theme_colors(self):
+        """Allocate a color pair for every element of every theme, once"""
+        pairs = []
+        index = {}
+        for theme in self.themes:
+            for pair in theme.pairs():
+                if pair not in index:
+                    index[pair] = len(pairs)
+                    pairs.append(pair)
+        attrs = self.backend.init_pairs(pairs)
+        self.theme_attrs = [
+            {role: attrs[index[pair]] for role, pair in zip(Theme.ROLES, theme.pairs())}
+            for theme in self.themes
+        ]
+        self.set_theme(self.theme_index)
+
+    def set_theme(self, index):
+        """Switch to a theme, without allocating any colors"""
+        self.theme_index = index
+        attrs = self.theme_attrs[index]
+        self.digit_attr = attrs['digits']
+        self.colon_attr = attrs['colon']
+        self.date_attr = attrs['date']
+        self.info_attr = attrs['info']
+        self.zone_attr = attrs['zones']
+        self.label_attr = attrs['labels']
+        self.status_attr = attrs['status']
+        # Cells the frame leaves blank take the theme's background
+        self.backend.set_background(self.status_attr)
+        self.renderer.invalidate()
+
+    def apply_config(self, changed=None):
+        """Copy config values to the instance variables, rebuilding only what the changed keys affect"""
+        config = self.config
+        if changed is None:
+            changed = set(config)
+        for key in changed:
+            attr = self.CONFIG_ATTRS.get(key)
+            if attr is not None:
+                setattr(self, attr, config[key])
+        if 'format' in changed:
+            self.format_24h = config['format'] == '24h'
+        if 'power_save' in changed:
+            self.next_power_check = 0.0
+        if self.themes and ('color' in changed or 'bg_color' in changed):
+            # The built-in theme follows the color settings; it needs new pairs
+            self.themes[0] = Theme('custom', self.color, self.bg_color)
+            if self.renderer is not None:
+                self.init_theme_colors()
+        if self.themes and 'theme' in changed:
+            self.theme_index = self.find_theme(config['theme'])
+            if self.renderer is not None:
+                self.set_theme(self.theme_index)
+        if ('font' in changed or 'transition' in changed) and self.font_data:
+            # Glyphs and transition frames are cached per font and style, so
+            # only the newly selected ones need loading
+            self.get_transitions()
+        if 'info' in changed and not self.show_info:
+            # Nothing to sample for; get_system_info() starts it again when
+            # the panel comes back
+            self.stop_sampler()
+        if 'info_items' in changed or any(key.endswith('_interval') for key in changed):
+            # Restarted with the new items and intervals on next use
+            self.stop_sampler()
+        if 'zones' in changed:
+            zones = [zone.strip() for zone in config['zones'].split(',') if zone.strip()]
+            # Raises ValueError for an unknown zone, leaving the old panel up
+            self.world_clock = WorldClock(zones) if zones else None
+
+    def reload_config(self):
+        """Re-read the config file and apply only the keys that changed"""
+        previous = self.config
+        self.load_config_file(previous)
+        changed = {key for key, value in self.config.items() if previous.get(key) != value}
+        try:
+            self.apply_config(changed)
+        except ValueError as e:
+            self.config_error = str(e)
+            self.config['zones'] = previous['zones']
+
+    # Font name -> file in the fonts directory, in cycling order
+    FONT_FILES = {
+        'block': 'block.font',
+        'slim': 'slim.font',
+        'digital': 'digital.font',
+        'rounded': 'rounded.font',
+        'ascii': 'ascii.font',
+        'outline': 'outline.font',
+        'star': 'star.font',
+        'braille': 'braille.font',
+        'dots': 'dots.font'
+    }
 
     def load_fonts(self):
-        """Load font data from font files"""
+        """Load the active font; other fonts and transition frames are loaded when first used"""
+        self.get_font(self.current_font)
+
+    def get_font(self, font_name):
+        """Get the glyph atlas for a font, loading it on first use"""
+        atlas = self.font_data.get(font_name)
+        if atlas is None:
+            atlas = self.load_font(font_name)
+            self.font_data[font_name] = atlas
+        return atlas
+
+    def load_font(self, font_name):
+        """Load a font's glyph atlas from the cache or its .font file"""
         fonts_dir = os.path.join(os.path.dirname(__file__), 'fonts')
-        font_files = {
-            'block': 'block.font',
-            'slim': 'slim.font',
-            'digital': 'digital.font',
-            'rounded': 'rounded.font',
-            'ascii': 'ascii.font',
-            'outline': 'outline.font',
-            'star': 'star.font',
-            'braille': 'braille.font',
-            'dots': 'dots.font'
-        }
+        filepath = os.path.join(fonts_dir, self.FONT_FILES.get(font_name, f'{font_name}.font'))
+        try:
+            stat = os.stat(filepath)
+        except OSError:
+            if font_name in STROKE_FONTS:
+                return STROKE_FONTS[font_name].atlas()
+            # Load a default font if the file doesn't exist
+            return self.get_default_atlas()
+
+        atlas, cached_digest = GlyphAtlas.load_cached(font_name, stat)
+        if atlas is not None:
+            return atlas
+
+        try:
+            with open(filepath, 'rb') as f:
+                content = f.read()
+            import hashlib
+            digest = hashlib.sha1(content).hexdigest()
+            if cached_digest == digest:
+                # Only the mtime changed; reuse the cache and refresh its key
+                atlas, _ = GlyphAtlas.load_cached(font_name, stat, digest)
+            if atlas is None:
+                font = self.parse_font(content.decode('utf-8'))
+                atlas = GlyphAtlas.compile(font_name, font, self.get_default_font())
+            atlas.save_cached(stat, digest)
+            return atlas
+        except Exception as e:
+            # Fonts load on first use, often while curses owns the screen,
+            # so the error goes to the status row rather than stdout
+            self.config_error = f"Error loading font {font_name}: {e}"
+            return self.get_default_atlas()
+
+    def get_transitions(self, font=None):
+        """Get the transition table for a font (the active one by default) and style, building it once"""
+        if font is None:
+            font = self.get_font(self.current_font)
+        style = self.transition_style if self.transition_style in TRANSITION_STYLES else 'fade'
+        key = (font.name, font.scale, style)
+        table = self.transition_tables.get(key)
+        if table is None:
+            base = None
+            if font.scale != 1 and font.rasterizer is None:
+                base = self.get_transitions(self.get_font(font.name))
+            table = TransitionTable(font, style, base)
+            self.transition_tables[key] = table
+        return table
+
+    MAX_SCALED_FONTS = 8  # Scaled atlases kept before the cache is emptied
+
+    def get_scaled_font(self, font_name, scale):
+        """Get a font's atlas at a scale, building it on first use"""
+        if scale == 1:
+            return self.get_font(font_name)
+        key = (font_name, scale)
+        atlas = self.scaled_fonts.get(key)
+        if atlas is None:
+            if len(self.scaled_fonts) >= self.MAX_SCALED_FONTS:
+                # Sizes seen during a long resize drag aren't worth keeping
+                # Emptied in place, as --serve views share these caches
+                self.scaled_fonts.clear()
+                for key in [k for k in self.transition_tables if k[1] != 1]:
+                    del self.transition_tables[key]
+            atlas = self.get_font(font_name).scaled(scale)
+            self.scaled_fonts[key] = atlas
+        return atlas
+
+    def get_display_font(self, time_str):
+        """The active font at the largest allowed scale that fits the screen"""
+        key = (self.lines, self.cols, self.current_font, self.scale, len(time_str),
+               self.show_date, self.show_info, self.get_panel())
+        if key == self.display_font_key:
+            return self.display_font
+        font = self.get_font(self.current_font)
         
-        for font_name, filename in font_files.items():
-            filepath = os.path.join(fonts_dir, filename)
-            if os.path.exists(filepath):
-                try:
-                    self.font_data[font_name] = self.load_font_file(filepath)
-                except Exception as e:
-                    print(f"Error loading font {font_name}: {e}")
-                    # Load a default font if the file doesn't exist
-                    self.font_data[font_name] = self.get_default_font()
-            else:
-                # Load a default font if the file doesn't exist
-                self.font_data[font_name] = self.get_default_font()
+        # Rows left for the clock once the date and a compact world clock fit
+        rows = self.lines - (2 if self.show_date else 0)
+        panel = self.get_panel()
+        if panel is not None:
+            rows -= len(panel.timers if panel is self.timers else panel.zones) + 1
+        cols = self.cols
+        if self.show_info and self.scale == 'auto':
+            # Keep a filled screen clear of the info panel in the top right
+            cols -= 2 * Layout.INFO_WIDTH
+        width = Layout.text_width(time_str, font)
+        fit = min(cols / max(1, width), rows / max(1, font.height))
+        limit = fit if self.scale == 'auto' else min(fit, float(self.scale))
+        scale = max(1.0, math.floor(limit * 2) / 2)
+        
+        # Rounding up to whole cells can still overflow; step down until it fits
+        while scale > 1:
+            scaled = self.get_scaled_font(self.current_font, scale)
+            if Layout.fits(time_str, scaled, rows, cols):
+                break
+            scale -= 0.5
+        
+        self.display_font_key = key
+        self.display_font = self.get_scaled_font(self.current_font, scale)
+        return self.display_font
+
+    def get_default_atlas(self):
+        """Return the compiled default font"""
+        atlas = self.font_data.get(None)
+        if atlas is None:
+            default_font = self.get_default_font()
+            atlas = GlyphAtlas.compile('default', default_font, default_font)
+            self.font_data[None] = atlas
+        return atlas
 
     def get_default_font(self):
         """Return a default font if font file doesn't exist"""
@@ -256,15 +3029,24 @@ info=false
                 "     ",
                 "  █  ",
                 "     "
+            ],
+            '.': [
+                "     ",
+                "     ",
+                "     ",
+                "     ",
+                "  █  "
             ]
         }
 
     def load_font_file(self, filepath):
         """Load font from a .font file"""
+        with open(filepath, 'r', encoding='utf-8') as f:
+            return self.parse_font(f.read())
+
+    def parse_font(self, content):
+        """Parse the contents of a .font file"""
         font = {}
-        with open(filepath, 'r') as f:
-            content = f.read()
-            
         # Parse the font file
         lines = content.split('\n')
         i = 0
@@ -300,179 +3082,332 @@ info=false
         curses.cbreak()
         self.stdscr.keypad(True)
         curses.curs_set(0)  # Hide cursor
+        # Input is only read once select() reports it, so getch() never blocks
+        self.stdscr.nodelay(True)
+        self.attach(CursesBackend(self.stdscr))
+
+    def init_events(self):
+        """Set up one selector for keyboard input, resize signals and timeouts"""
+        import selectors
+        import signal
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(sys.stdin.fileno(), selectors.EVENT_READ, 'input')
+        
+        # SIGWINCH wakes select() through a self-pipe
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        os.set_blocking(write_fd, False)
+        self.wakeup_fds = (read_fd, write_fd)
+        self.selector.register(read_fd, selectors.EVENT_READ, 'signal')
+        signal.set_wakeup_fd(write_fd)
         
-        # Initialize color pairs
-        for i, (name, color_val) in enumerate(self.colors.items(), 1):
-            curses.init_pair(i, color_val, -1)
+        # Config edits wake select() through inotify when it's available
+        if self.config_watcher is not None:
+            watch_fd = self.config_watcher.start()
+            if watch_fd is not None:
+                self.selector.register(watch_fd, selectors.EVENT_READ, 'config')
+        signal.signal(signal.SIGWINCH, self.on_sigwinch)
+
+    def cleanup_events(self):
+        """Tear down the selector and restore signal handling"""
+        if self.selector is None:
+            return
+        import signal
+        signal.signal(signal.SIGWINCH, signal.SIG_DFL)
+        signal.set_wakeup_fd(-1)
+        self.selector.close()
+        if self.config_watcher is not None:
+            self.config_watcher.stop()
+        for fd in self.wakeup_fds:
+            os.close(fd)
+        self.selector = None
+        self.wakeup_fds = None
+
+    def on_sigwinch(self, signum, frame):
+        """Note a terminal resize; the main loop handles it"""
+        self.resize_pending = True
+
+    def handle_resize(self):
+        """Resize curses to the new terminal size and repaint"""
+        self.resize_pending = False
+        try:
+            size = os.get_terminal_size(sys.__stdout__.fileno())
+            curses.resizeterm(size.lines, size.columns)
+        except (OSError, curses.error):
+            pass
+        curses.update_lines_cols()
+        self.renderer.invalidate()
+
+    def attach(self, backend):
+        """Render through the given backend (curses, or headless for embedding)"""
+        self.backend = backend
+        self.renderer = Renderer(backend)
+        self.lines, self.cols = backend.size()
         
-        # Set up color mapping for drawing
-        self.main_color_pair = curses.color_pair(list(self.colors.keys()).index(self.color) + 1)
-        self.default_color_pair = curses.color_pair(1)  # Default to white
+        # Color pairs for every theme are allocated here, once
+        if not self.themes:
+            self.load_themes()
+        self.init_theme_colors()
 
     def cleanup_curses(self):
         """Clean up curses settings"""
+        self.cleanup_events()
         if self.stdscr:
-            curses.nocbreak()
-            self.stdscr.keypad(False)
-            curses.echo()
-            curses.endwin()
+            try:
+                curses.nocbreak()
+                self.stdscr.keypad(False)
+                curses.echo()
+                curses.endwin()
+            except curses.error:
+                pass  # The terminal hung up; there is nothing left to restore
 
     def get_time_string(self):
-        """Get current time as formatted string"""
-        now = datetime.now()
-        if self.format_24h:
-            return now.strftime("%H:%M:%S")
-        else:
-            return now.strftime("%I:%M:%S %p")
+        """Get the time of the current frame (or the selected timer) as formatted string"""
+        if self.timers is not None:
+            return self.timers.update(self.time_source.mono_ns)
+        return self.time_source.time_string(self.format_24h, self.show_seconds)
 
     def get_date_string(self):
-        """Get current date as formatted string"""
-        now = datetime.now()
-        return now.strftime("%A, %B %d, %Y")
+        """Get the date of the current frame as formatted string"""
+        return self.time_source.date_string()
+
+    def get_sample_intervals(self):
+        """Get per-metric sampling intervals from the config"""
+        intervals = {}
+        for metric in SystemSampler.DEFAULT_INTERVALS:
+            value = self.config.get(f'{metric}_interval')
+            if value is not None:
+                intervals[metric] = value
+        return intervals
+
+    def start_sampler(self):
+        """Start the background system info sampler if it isn't running"""
+        if self.sampler is None:
+            self.sampler = SystemSampler(self.get_sample_intervals(), self.config.get('info_items', INFO_ITEMS))
+            self.sampler.start()
+
+    def stop_sampler(self):
+        """Stop the background system info sampler"""
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.sampler = None
+
+    # Info item -> title used for it in error rows
+    INFO_TITLES = {'cpu': 'CPU', 'ram': 'RAM', 'disk': 'Disk', 'net': 'Network', 'battery': 'Battery'}
 
     def get_system_info(self):
-        """Get system information (CPU, RAM, Battery)"""
-        try:
-            import psutil
-            
-            # Get CPU usage
-            cpu_percent = psutil.cpu_percent(interval=0.1)  # Short interval for responsiveness
-            
-            # Get RAM usage
-            ram = psutil.virtual_memory()
-            ram_percent = ram.percent
-            
-            # Get disk usage for root directory
-            disk_usage = psutil.disk_usage('/')
-            disk_percent = int((disk_usage.used / disk_usage.total) * 100)
-            
-            # Battery info (if available)
-            battery = None
-            battery_str = "Battery: N/A"
-            if hasattr(psutil, "sensors_battery"):
-                battery = psutil.sensors_battery()
-                if battery is not None:
-                    battery_percent = int(battery.percent)
-                    if battery.power_plugged:
-                        battery_str = f"Battery: {battery_percent}% (Charging)"
-                    else:
-                        battery_str = f"Battery: {battery_percent}%"
-            else:
-                # On some systems, battery info isn't available through sensors_battery
-                # We can try another approach or just show N/A
-                battery_str = "Battery: N/A"
-            
-            # Network I/O stats (showing total since boot)
-            net_io = psutil.net_io_counters()
-            network_info = f"Net: Rx+Tx {(net_io.bytes_recv + net_io.bytes_sent) // (1024*1024)}MB"
-            
-            return {
-                'cpu': f"CPU: {cpu_percent}%",
-                'ram': f"RAM: {ram_percent}%",
-                'disk': f"Disk: {disk_percent}%",
-                'battery': battery_str,
-                'network': network_info
-            }
-        except ImportError:
-            # psutil not installed
-            return {
-                'cpu': "CPU: N/A (psutil req)",
-                'ram': "RAM: N/A (psutil req)",
-                'disk': "Disk: N/A (psutil req)",
-                'battery': "Battery: N/A (psutil req)",
-                'network': "Network: N/A (psutil req)"
-            }
-        except Exception as e:
-            # Handle any other error
-            return {
-                'cpu': f"CPU: Error ({str(e)})",
-                'ram': "RAM: Error",
-                'disk': "Disk: Error",
-                'battery': "Battery: Error",
-                'network': "Network: Error"
-            }
+        """Get the info panel rows as (text, sparkline) pairs from the latest sample"""
+        self.start_sampler()
+        snapshot = self.sampler.snapshot()
+        if snapshot is self._info_snapshot:
+            return self._info_lines
+
+        items = self.sampler.items
+        if snapshot.error:
+            # Neither /proc nor psutil to sample with
+            titles = [self.INFO_TITLES[name] + (f" {arg}" if arg else '') for name, arg in items]
+            info = [(f"{title}: N/A (psutil req)", '') for title in titles]
+        else:
+            history = snapshot.history
+
+            def row(label, value, metric=None):
+                text = value if value is not None else '--'
+                text = f"{label:<4}{text:>{max(len(text) + 1, 11 - max(4, len(label)))}}"
+                spark = history.get(metric, '')
+                # The newest samples, in whatever room the label leaves
+                return (text, spark[max(0, len(spark) - (Layout.INFO_WIDTH - len(text) - 1)):])
+
+            def rate(value):
+                return format_rate(value) if value is not None else None
+
+            info = []
+            for name, arg in items:
+                item = f"{name}:{arg}" if arg else name
+                # Only the items whose own metrics failed show an error
+                failed = [snapshot.errors[metric] for metric in SystemSampler.ITEM_METRICS[name] or (name,)
+                          if metric in snapshot.errors]
+                if failed:
+                    title = self.INFO_TITLES[name] + (f" {arg}" if arg else '')
+                    info.append((f"{title}: Error ({failed[0]})"[:Layout.INFO_WIDTH], ''))
+                elif name == 'cpu' and arg:
+                    cores = snapshot.cores or ()
+                    core = cores[int(arg)] if int(arg) < len(cores) else None
+                    info.append(row(f"CPU{arg}", f"{core:.1f}%" if core is not None else None, item))
+                elif name == 'cpu':
+                    info.append(row('CPU', f"{snapshot.cpu:.1f}%" if snapshot.cpu is not None else None, 'cpu'))
+                    if snapshot.cores:
+                        # One bar per core for its latest sample
+                        bars = ''.join(MetricHistory.bar(core, 100.0) for core in snapshot.cores)
+                        info.append(("Cores", bars[:Layout.INFO_WIDTH - 6]))
+                elif name == 'ram':
+                    info.append(row('RAM', f"{snapshot.ram:.1f}%" if snapshot.ram is not None else None, 'ram'))
+                elif name == 'disk':
+                    if arg:
+                        info.append((arg[:Layout.INFO_WIDTH], ''))
+                    disk = snapshot.disk.get(item)
+                    info.append(row('Disk', f"{disk}%" if disk is not None else None))
+                    info.append(row('I/O', rate(snapshot.io.get(item)), item))
+                elif name == 'net':
+                    if arg:
+                        info.append((arg[:Layout.INFO_WIDTH], ''))
+                    rx, tx = snapshot.network.get(item) or (None, None)
+                    info.append(row('Rx', rate(rx), f"{item} rx"))
+                    info.append(row('Tx', rate(tx), f"{item} tx"))
+                elif name == 'battery':
+                    battery_str = "Battery: N/A"
+                    if snapshot.battery is not None:
+                        battery_percent, power_plugged = snapshot.battery
+                        if power_plugged:
+                            battery_str = f"Battery: {battery_percent}% (Charging)"
+                        else:
+                            battery_str = f"Battery: {battery_percent}%"
+                    info.append((battery_str, ''))
+
+        self._info_snapshot = snapshot
+        self._info_lines = info
+        return info
 
     def interpolate_digits(self, old_digit, new_digit, progress):
         """Interpolate between two digits for smooth transition"""
-        font = self.font_data.get(self.current_font, {})
-        old_rep = font.get(old_digit, font.get('0', self.get_default_font()['0']))
-        new_rep = font.get(new_digit, font.get('0', self.get_default_font()['0']))
-        
-        result = []
-        for i in range(len(old_rep)):
-            old_line = old_rep[i]
-            new_line = new_rep[i]
-            interpolated_line = ""
-            for j in range(len(old_line)):
-                # Simple fade effect - blend characters based on progress
-                if progress < 0.5 and old_line[j] != ' ':
-                    interpolated_line += old_line[j]
-                elif progress >= 0.5 and new_line[j] != ' ':
-                    interpolated_line += new_line[j]
-                else:
-                    # Blend gradually
-                    if progress > 0.3 and new_line[j] != ' ':
-                        interpolated_line += new_line[j]
-                    else:
-                        interpolated_line += old_line[j]
-            result.append(interpolated_line)
-        return result
+        return self.get_transitions(self.layout.font).frame(old_digit, new_digit, progress)
 
     def draw_digit(self, y, x, digit_char, color_pair=None, alpha=1.0):
         """Draw a single digit using the loaded font"""
         if color_pair is None:
-            color_pair = self.main_color_pair
+            color_pair = self.digit_attr
             
-        font = self.font_data.get(self.current_font, {})
-        digit_representation = font.get(digit_char, font.get('0', self.get_default_font()['0']))
+        font = self.layout.font
+        digit_representation = font.glyph(digit_char)
         
-        # If alpha is less than 1, we're fading
-        if alpha < 1.0:
-            for i, line in enumerate(digit_representation):
-                if y + i < curses.LINES:
-                    # Apply fading effect
-                    faded_line = ""
-                    for ch in line:
-                        if ch != ' ' and alpha > 0.3:
-                            faded_line += ch
-                        else:
-                            faded_line += ' '
-                    self.stdscr.addstr(y + i, x, faded_line, color_pair)
-        else:
-            for i, line in enumerate(digit_representation):
-                if y + i < curses.LINES:
-                    self.stdscr.addstr(y + i, x, line, color_pair)
+        # A mostly faded digit is drawn as blank cells
+        if alpha <= 0.3:
+            digit_representation = font.blank
+            
+        for i, line in enumerate(digit_representation):
+            if y + i < self.lines:
+                self.renderer.put(y + i, x, line, color_pair)
     
     def draw_interpolated_digit(self, y, x, old_digit, new_digit, progress, color_pair=None):
         """Draw a digit that's transitioning between old and new values"""
         if color_pair is None:
-            color_pair = self.main_color_pair
+            color_pair = self.digit_attr
             
         interpolated_rep = self.interpolate_digits(old_digit, new_digit, progress)
         
         for i, line in enumerate(interpolated_rep):
-            if y + i < curses.LINES:
-                self.stdscr.addstr(y + i, x, line, color_pair)
+            if y + i < self.lines:
+                self.renderer.put(y + i, x, line, color_pair)
 
-    def draw_clock(self, time_str):
-        """Draw the clock with the given time string"""
-        # Clear screen
-        self.stdscr.clear()
+    def render_frame(self, time_str=None):
+        """Draw one complete frame and send the changes to the backend"""
+        if time_str is None:
+            self.time_source.tick()
+            time_str = self.get_time_string()
+        self.lines, self.cols = self.backend.size()
+        self.renderer.begin_frame()
+        if self.config_error:
+            self.renderer.put(self.lines - 1, 0, self.config_error[:self.cols - 1], self.status_attr)
+        
+        profiler = self.profiler
+        if profiler is None:
+            self.draw_clock(time_str)
+            self.draw_zones()
+            self.draw_timers()
+            self.draw_date()
+            self.draw_info()
+            
+            # Only the cells that changed are sent to the backend
+            self.renderer.end_frame()
+            return
         
-        # Calculate center position
-        max_height = 5  # Height of digit representation
-        time_width = 0
-        for char in time_str:
-            if char != ' ':
-                time_width += 5  # Width of each digit
+        # Same as above, timing each stage
+        t0 = time.perf_counter()
+        self.draw_clock(time_str)
+        self.draw_zones()
+        self.draw_timers()
+        t1 = time.perf_counter()
+        self.draw_date()
+        t2 = time.perf_counter()
+        self.draw_info()
+        t3 = time.perf_counter()
+        self.renderer.put(0, 0, profiler.overlay_text(), self.status_attr)
+        self.renderer.end_frame()
+        t4 = time.perf_counter()
+        profiler.record('clock', t1 - t0)
+        profiler.record('date', t2 - t1)
+        profiler.record('info', t3 - t2)
+        profiler.record('refresh', t4 - t3)
+        if self.sampler is not None:
+            profiler.sampler_cost = self.sampler.snapshot().cost
+        profiler.frame_done()
+
+    def get_layout(self, time_str):
+        """Get the cached layout, recomputing it if the screen, font or format changed"""
+        font = self.get_display_font(time_str)
+        lines = self.lines
+        top = 0
+        bottom = None
+        panel = self.get_panel()
+        if panel is not None:
+            # The main clock and date sit directly above the world clock or
+            # timer list, with the two centred together; zone tiles stay unscaled
+            main_rows = font.height + (2 if self.show_date else 0)
+            if panel is self.timers:
+                reserved = panel.plan(self.lines, self.cols, main_rows)
             else:
-                time_width += 2  # Space width
-                
-        start_x = (curses.COLS - time_width) // 2
-        start_y = (curses.LINES - max_height) // 2
+                reserved = panel.plan(self.lines, self.cols, self.get_font(self.current_font),
+                                      self.format_24h, main_rows, self.show_seconds)
+            if reserved:
+                top = max(0, (self.lines - main_rows - reserved) // 2)
+                lines = min(self.lines - top, font.height)
+                bottom = top + main_rows
+                panel.top = bottom + 1
+        elif self.stream_mode == 'block':
+            # The block is exactly the clock, plus the date rows below it
+            lines = font.height
+            bottom = self.lines
+        key = (lines, self.cols, self.current_font, font.scale, len(time_str), top, bottom)
+        if self.layout is None or self.layout.key != key:
+            self.layout = Layout(key, lines, self.cols, font, time_str, top, bottom)
+        return self.layout
+
+    def get_panel(self):
+        """The panel below the main clock: the timer list when there are several timers, else the world clock"""
+        if self.timers is not None:
+            return self.timers if len(self.timers.timers) > 1 else None
+        return self.world_clock
+
+    def draw_zones(self):
+        """Draw the world clock panel below the main clock"""
+        if self.world_clock is None or self.layout is None or self.timers is not None:
+            return
+        self.world_clock.draw(self.renderer, self.world_clock.top, self.lines, self.get_font(self.current_font),
+                              self.time_source.second, self.format_24h, self.show_seconds,
+                              self.zone_attr, self.label_attr)
+
+    def draw_timers(self):
+        """Draw the list of timers below the selected one"""
+        if self.layout is None or self.get_panel() is not self.timers or self.timers is None:
+            return
+        self.timers.draw(self.renderer, self.lines, self.zone_attr, self.label_attr)
+
+    def draw_clock(self, time_str):
+        """Draw the clock with the given time string"""
+        layout = self.get_layout(time_str)
+        if not layout.show_seconds:
+            time_str = Layout.drop_seconds(time_str)
+        if layout.compact:
+            # Too small for big digits; draw the time as plain text
+            self.last_time_shown = time_str
+            self.is_transitioning = False
+            self.renderer.put(layout.start_y, layout.start_x, time_str, self.digit_attr)
+            return
         
         # Check if we need to animate transition
-        if self.animation_enabled and self.last_time_shown and self.last_time_shown != time_str:
+        animate = self.animation_enabled and not self.low_power
+        if self.timers is not None and self.timers.centis:
+            animate = False  # Hundredths change every frame; there's nothing to fade between
+        if animate and self.last_time_shown and self.last_time_shown != time_str:
             self.is_transitioning = True
             self.transition_progress += 0.1  # Increase progress each frame
             if self.transition_progress >= 1.0:
@@ -481,121 +3416,791 @@ info=false
                 self.last_time_shown = time_str
         else:
             self.last_time_shown = time_str
+            self.is_transitioning = False
+            self.transition_progress = 0.0
             
         # Draw each character
-        current_x = start_x
+        start_y = layout.start_y
         for i, char in enumerate(time_str):
-            if char == ' ':
-                current_x += 2  # Add space width
+            x = layout.positions[i]
+            if x is None:
+                continue  # Space
+            attr = self.colon_attr if char == ':' else self.digit_attr
+            if self.is_transitioning and i < len(self.last_time_shown):
+                old_char = self.last_time_shown[i]
+                self.draw_interpolated_digit(start_y, x, old_char, char, self.transition_progress, attr)
             else:
-                # Store position for animation
-                pos_key = f"{i}_{char}"
-                self.digit_positions[pos_key] = (start_y, current_x)
-                
-                if self.is_transitioning and i < len(self.last_time_shown):
-                    old_char = self.last_time_shown[i] if i < len(self.last_time_shown) else ' '
-                    self.draw_interpolated_digit(start_y, current_x, old_char, char, self.transition_progress)
-                else:
-                    self.draw_digit(start_y, current_x, char)
-                current_x += 5  # Move to next digit position
+                self.draw_digit(start_y, x, char, attr)
 
     def draw_date(self):
         """Draw the date below the clock"""
-        if not self.show_date:
+        if not self.show_date or self.layout is None or self.layout.date_y is None:
             return
             
         date_str = self.get_date_string()
-        x_pos = (curses.COLS - len(date_str)) // 2
-        y_pos = (curses.LINES - 5) // 2 + 6  # Below the clock
-        
-        if y_pos < curses.LINES:
-            self.stdscr.addstr(y_pos, x_pos, date_str, self.main_color_pair)
+        x_pos = max(0, (self.cols - len(date_str)) // 2)
+        self.renderer.put(self.layout.date_y, x_pos, date_str, self.date_attr)
 
     def draw_info(self):
         """Draw system information panel"""
-        if not self.show_info:
+        if not self.show_info or self.layout is None:
             return
             
         info = self.get_system_info()
-        info_lines = [info['cpu'], info['ram'], info['disk'], info['battery'], info['network']]
         
-        # Position info panel at top right
-        panel_start_col = curses.COLS - 25  # Start from right side
-        for i, line in enumerate(info_lines):
-            if i + 2 < curses.LINES and panel_start_col > 0:
-                self.stdscr.addstr(i + 2, max(0, panel_start_col), line, self.main_color_pair)
+        # Position info panel at top right, sparklines after the values
+        layout = self.layout
+        for i, (text, spark) in enumerate(info[:layout.info_rows]):
+            self.renderer.put(Layout.INFO_ROW + i, layout.info_x, text, self.info_attr)
+            if spark:
+                self.renderer.put(Layout.INFO_ROW + i, layout.info_x + len(text) + 1, spark, self.info_attr)
+
+    def wait_for_frame(self):
+        """Wait for the next frame deadline, a keypress or a resize, returning any keys"""
+        while not self.resize_pending:
+            remaining = self.scheduler.remaining()
+            if remaining <= 0:
+                return []
+            # Round up so we never wake just before a second boundary
+            events = self.selector.select(math.ceil(remaining * 1000) / 1000)
+            for selector_key, _ in events:
+                if selector_key.data == 'signal':
+                    try:
+                        while os.read(self.wakeup_fds[0], 512):
+                            pass
+                    except BlockingIOError:
+                        pass
+                elif selector_key.data == 'config':
+                    self.config_pending = True
+                    return []
+                else:
+                    keys = self.read_keys()
+                    if keys:
+                        return keys
+                    if self.input_hung_up():
+                        # The terminal is gone (e.g. a closed ssh session with
+                        # SIGHUP ignored); stdin would stay readable forever
+                        self.running = False
+                        return []
+        return []
+
+    def input_hung_up(self):
+        """Whether stdin reports a hangup or error rather than keys"""
+        import select
+        poller = select.poll()
+        poller.register(sys.stdin.fileno(), select.POLLIN)
+        return any(events & (select.POLLHUP | select.POLLERR | select.POLLNVAL)
+                   for _, events in poller.poll(0))
+
+    def read_keys(self):
+        """Read every key that is waiting, without blocking"""
+        keys = []
+        while True:
+            key = self.stdscr.getch()
+            if key == -1:
+                return keys
+            keys.append(key)
 
-    def handle_input(self):
+    def handle_input(self, key):
         """Handle keyboard input"""
         try:
-            # Use nodelay to avoid blocking, but with a small timeout
-            self.stdscr.nodelay(True)
-            key = self.stdscr.getch()
-            self.stdscr.nodelay(False)  # Reset to blocking mode
-            
-            if key != -1:  # Only process if a key was pressed
-                if key == ord('q') or key == 27:  # q or ESC to quit
-                    self.running = False
-                elif key == ord('r'):  # r to reload config
-                    self.load_config_file()
-                    # Reapply settings
-                    self.current_font = self.config['font']
-                    self.color = self.config['color']
-                    self.bg_color = self.config['bg_color']
-                    self.animation_enabled = self.config['animation']
-                    self.show_date = self.config['date']
-                    self.show_info = self.config['info']
-                    self.format_24h = self.config['format'] == '24h'
-                elif key == ord('f'):  # f to cycle fonts
-                    font_list = list(self.font_data.keys())
-                    current_idx = font_list.index(self.current_font) if self.current_font in font_list else 0
-                    next_idx = (current_idx + 1) % len(font_list)
-                    self.current_font = font_list[next_idx]
+            if key == ord('q') or key == 27:  # q or ESC to quit
+                self.running = False
+            elif key == ord('r'):  # r to reload config
+                self.reload_config()
+            elif key == ord('f'):  # f to cycle fonts
+                font_list = list(self.FONT_FILES)
+                current_idx = font_list.index(self.current_font) if self.current_font in font_list else 0
+                next_idx = (current_idx + 1) % len(font_list)
+                self.current_font = font_list[next_idx]
+                self.get_transitions()
+            elif key == ord('c'):  # c to cycle themes
+                self.set_theme((self.theme_index + 1) % len(self.themes))
+            elif self.timers is not None and key == ord(' '):  # Space starts or pauses the timer
+                self.timers.toggle(time.monotonic_ns())
+            elif self.timers is not None and key == ord('x'):  # x resets it
+                self.timers.reset()
+            elif self.timers is not None and key == ord('\t'):  # Tab shows the next timer
+                self.timers.select_next()
+            elif key == ord('t'):  # t to cycle transition styles
+                style_list = list(TRANSITION_STYLES)
+                current_idx = style_list.index(self.transition_style) if self.transition_style in style_list else 0
+                self.transition_style = style_list[(current_idx + 1) % len(style_list)]
+                self.get_transitions()
         except:
             pass  # Ignore errors in input handling
 
+    POWER_CHECK_INTERVAL = 60.0  # Seconds between battery checks in auto power-save
+
+    def update_power_state(self):
+        """Switch low-power mode on or off following the power_save setting"""
+        if self.power_save != 'auto':
+            self.low_power = self.power_save == 'on'
+            return
+        now = time.monotonic()
+        if now < self.next_power_check:
+            return
+        self.next_power_check = now + self.POWER_CHECK_INTERVAL
+        self.low_power = self.on_battery()
+
+    def on_battery(self):
+        """Whether the machine is running on battery power"""
+        battery = None
+        if self.sampler is not None:
+            battery = self.sampler.snapshot().battery
+        else:
+            try:
+                stats = system_stats()
+                status = stats.sensors_battery() if hasattr(stats, "sensors_battery") else None
+                if isinstance(stats, ProcStats):
+                    stats.close()
+                if status is not None:
+                    battery = (int(status.percent), status.power_plugged)
+            except Exception:
+                # No /proc or psutil, or no battery support; never switch automatically
+                self.power_save = 'off'
+        # power_plugged is None when the state is unknown; only a definite
+        # "unplugged" counts as running on battery
+        return battery is not None and battery[1] is False
+
+    def check_config(self):
+        """Reload the config file if it changed on disk, returning whether it did"""
+        watcher = self.config_watcher
+        if watcher is None:
+            return False
+        # With inotify, only look once an event arrived; otherwise poll the
+        # mtime on every tick
+        if watcher.fd is not None and not self.config_pending:
+            return False
+        self.config_pending = False
+        if not watcher.changed():
+            return False
+        self.reload_config()
+        return True
+
+    def schedule_frame(self, transitioning=None):
+        """Set the deadline of the next frame, given whether a transition is under way (ours by default)"""
+        timers = self.timers
+        if transitioning is None:
+            transitioning = self.is_transitioning
+        # Timers' hundredths are shown at the steady animation frame rate
+        animating = transitioning or (timers is not None and timers.centis and timers.running())
+        deadline = self.scheduler.next_deadline(animating, self.tick_granularity())
+        if timers is not None and not timers.centis:
+            # Timers tick on their own boundaries, not the wall clock's
+            wait = timers.next_change(time.monotonic_ns())
+            if wait is not None:
+                deadline = self.scheduler.bring_forward(wait)
+        return deadline
+
+    def start_timers(self):
+        """Set up the timers given on the command line, resuming saved ones"""
+        if self.timer_specs:
+            self.timers = TimerBoard.load(self.timer_specs, TimerBoard.state_path(), self.centis)
+
+    def tick_granularity(self):
+        """Seconds between ticks: one, or sixty when nothing on screen shows seconds"""
+        if self.show_seconds or self.show_info or self.profiler is not None:
+            return 1
+        return 60
+
+    STREAM_RETRY = 0.05  # Seconds between attempts to drain a backed-up stream
+
+    def stream_colors(self):
+        """Colors the terminal behind stdout supports, as curses.COLORS would report"""
+        if os.environ.get('COLORTERM') in ('truecolor', '24bit'):
+            return 1 << 24
+        if '256' in os.environ.get('TERM', ''):
+            return 256
+        return 8
+
+    def stream_line(self, time_str, ansi):
+        """One line of time, date and system info for --stream line"""
+        fields = [(time_str, self.digit_attr)]
+        if self.show_date:
+            fields.append((self.get_date_string(), self.date_attr))
+        if self.world_clock is not None:
+            second = self.time_source.second
+            for zone in self.world_clock.zones:
+                fields.append((f"{zone.label} {zone.time_string(second, self.format_24h, self.show_seconds)}",
+                               self.zone_attr))
+        if self.show_info:
+            # Values only; the per-core bars need the panel to make sense
+            info = [' '.join(text.split()) for text, _ in self.get_system_info() if text != "Cores"]
+            fields.append(("  ".join(info), self.info_attr))
+        if not ansi:
+            return "  ".join(text for text, _ in fields)
+        sgr = self.backend.sgr
+        return "  ".join(sgr[attr] + text for text, attr in fields) + sgr[0]
+
+    def run_stream(self):
+        """Write the clock to stdout as lines or big-digit blocks instead of full screen"""
+        fd = sys.stdout.fileno()
+        tty = os.isatty(fd)
+        ansi = tty and not self.stream_plain
+        writer = StreamWriter(fd)
+        # Each tick shows a single state, so there are no transitions
+        self.animation_enabled = False
+        self.config_watcher = ConfigWatcher(self.config_path)
+        
+        block = self.stream_mode == 'block'
+        if block:
+            # Big digits, with the date below; the info panel and world
+            # clock only fit on a full screen
+            self.show_info = False
+            self.world_clock = None
+            self.time_source.tick()
+            font = self.get_font(self.current_font)
+            lines = font.height + (2 if self.show_date else 0)
+            cols = Layout.text_width(self.get_time_string(), font)
+            if self.show_date:
+                cols = max(cols, 30)
+        else:
+            lines, cols = 1, 1
+        if ansi:
+            self.attach(AnsiBackend(writer, lines, cols, self.stream_colors()))
+        else:
+            self.attach(HeadlessBackend(lines, cols))
+        
+        was_blocking = os.get_blocking(fd)
+        if not tty:
+            # Only a pipe or file is made non-blocking: the flag belongs to the
+            # open file, which a terminal shares with the shell and everything
+            # else running in it
+            os.set_blocking(fd, False)
+            import signal
+            # Leave through the finally below, which restores the flag
+            for signum in (signal.SIGTERM, signal.SIGHUP):
+                signal.signal(signum, self.on_stream_signal)
+        last_time = ""
+        try:
+            while self.running:
+                self.time_source.tick()
+                current_time = self.get_time_string()
+                if self.check_config():
+                    last_time = ""
+                
+                # A stream that hasn't taken the last frame gets no new ones;
+                # the renderer's view of the block stays what was sent
+                if current_time != last_time and writer.drain():
+                    if block:
+                        self.render_frame(current_time)
+                        if not ansi:
+                            writer.send(("\n".join(self.backend.text()) + "\n\n").encode())
+                    elif ansi:
+                        writer.send(("\r" + self.stream_line(current_time, True) + "\x1b[K").encode())
+                    else:
+                        writer.send((self.stream_line(current_time, False) + "\n").encode())
+                    last_time = current_time
+                
+                self.schedule_frame()
+                remaining = self.scheduler.remaining()
+                if writer.pending:
+                    remaining = min(remaining, self.STREAM_RETRY)
+                if remaining > 0:
+                    time.sleep(remaining)
+        except KeyboardInterrupt:
+            pass
+        except BrokenPipeError:
+            return  # The reader went away (e.g. piped into head)
+        finally:
+            os.set_blocking(fd, was_blocking)
+        try:
+            writer.drain()
+            if ansi:
+                os.write(fd, b"\n")
+        except OSError:
+            pass
+
+    def on_stream_signal(self, signum, frame):
+        """Stop streaming on SIGTERM or SIGHUP"""
+        raise SystemExit(128 + signum)
+
+    def mark_startup(self, stage):
+        """Note that a startup stage just finished"""
+        self.startup_marks.append((stage, time.perf_counter()))
+
+    def finish_startup(self):
+        """Set up everything the first frame didn't need"""
+        self.init_events()
+        # Build the transition frames now rather than on the first change
+        self.get_transitions(self.layout.font if self.layout is not None else None)
+        self.update_power_state()
+
+    def startup_report(self):
+        """Time spent in each startup stage, as printed by --bench-startup"""
+        lines = []
+        previous = STARTED
+        for stage, finished in self.startup_marks:
+            lines.append(f"{stage:<12} {(finished - previous) * 1000:8.2f} ms")
+            previous = finished
+        first_frame = dict(self.startup_marks).get('first frame', previous)
+        lines.append(f"{'total':<12} {(first_frame - STARTED) * 1000:8.2f} ms to first frame")
+        return "\n".join(lines)
+
     def run(self):
         """Main run loop"""
         try:
-            self.save_default_config()  # Create default config if needed
-            self.load_config_file()
+            self.mark_startup('import')
+            for error in self.load_config_file():
+                print(f"Error in config file: {error}", file=sys.stderr)
             self.parse_arguments()
+            self.config_watcher = ConfigWatcher(self.config_path)
+            self.mark_startup('config')
             self.load_fonts()
+            for error in self.load_themes():
+                print(f"Error in theme file: {error}", file=sys.stderr)
+            self.start_timers()
+            self.mark_startup('fonts')
+            if self.stream_mode:
+                self.run_stream()
+                return
+            if self.serve_address:
+                ClockServer(self, self.serve_address).run()
+                return
+            if self.connect_address:
+                ClockClient(self, self.connect_address).run()
+                return
             self.init_curses()
+            self.mark_startup('curses')
             
-            last_time = ""
-            animation_counter = 0
+            # Show the first frame as early as possible; the rest of the
+            # setup happens right after it
+            self.time_source.tick()
+            last_time = self.get_time_string()
+            self.render_frame(last_time)
+            self.mark_startup('first frame')
+            self.finish_startup()
+            self.mark_startup('deferred')
+            if self.bench_startup:
+                return
             
             while self.running:
-                # Handle input
-                self.handle_input()
-                
-                # Get current time
+                self.update_power_state()
+
+                # Read the clock once for this frame
+                self.time_source.tick()
                 current_time = self.get_time_string()
                 
-                # Only redraw if time changed (or for animation effect)
-                if current_time != last_time or self.animation_enabled:
-                    self.draw_clock(current_time)
-                    self.draw_date()
-                    self.draw_info()
-                    
-                    self.stdscr.refresh()
+                # Only redraw if time changed or an animation is in progress
+                if current_time != last_time or self.is_transitioning or (
+                        self.timers is not None and self.timers.dirty):
+                    self.render_frame(current_time)
                     last_time = current_time
                 
-                # Check for terminal resize
-                curses.update_lines_cols()
+                # Sleep until the next second (or minute) boundary, or the
+                # next animation frame while a transition is running
+                self.schedule_frame()
+                t0 = time.perf_counter()
+                keys = self.wait_for_frame()
+                t1 = time.perf_counter()
                 
-                # Control refresh rate (about 10 FPS for smooth animation)
-                # If animating, update more frequently
-                if self.is_transitioning:
-                    time.sleep(0.05)  # More frequent updates during animation
-                else:
-                    time.sleep(0.1)
+                # Keys and resizes are handled as soon as they arrive
+                resized = self.resize_pending
+                for key in keys:
+                    self.handle_input(key)
+                if resized:
+                    self.handle_resize()
+                reloaded = self.check_config()
+                if keys or resized or reloaded:
+                    last_time = ""  # Redraw immediately with the new settings
+                
+                if self.profiler is not None:
+                    self.profiler.wakeups += 1
+                    self.profiler.record('sleep', t1 - t0)
+                    if keys:
+                        self.profiler.record('input', time.perf_counter() - t1)
+                    elif not resized and not reloaded:
+                        self.profiler.deadline_reached(-self.scheduler.remaining())
                 
         except KeyboardInterrupt:
             pass
         finally:
+            self.stop_sampler()
             self.cleanup_curses()
+            if self.timers is not None:
+                self.timers.save()
+            if self.profiler is not None:
+                self.profiler.write_log(final=True)
+                print(f"Profile written to {self.profiler.log_path}")
+            if self.bench_startup:
+                print(self.startup_report())
+
+def parse_address(text):
+    """Parse a --serve/--connect address: HOST:PORT, :PORT or a Unix socket path"""
+    host, sep, port = text.rpartition(':')
+    if sep and port.isdigit() and '/' not in text:
+        return ('tcp', host or 'localhost', int(port))
+    if not text:
+        raise ValueError("empty address")
+    return ('unix', text)
+
+
+def format_address(address):
+    """Address as given on the command line"""
+    if address[0] == 'tcp':
+        return f"{address[1]}:{address[2]}"
+    return address[1]
+
+
+def encode_message(message):
+    """One JSON line of the --serve protocol"""
+    import json
+    return (json.dumps(message, ensure_ascii=False, separators=(',', ':')) + '\n').encode()
+
+
+class ViewClock(TerminalClock):
+    """The served clock at one screen size and font, shared by the clients showing it"""
+
+    def __init__(self, server_clock, key):
+        super().__init__(server_clock.time_source)
+        self.key = key  # (lines, cols, font)
+        self.clients = set()
+        self.last_time = ""  # Time string of the last frame drawn
+        
+        # Settings come from the serving clock; fonts and transition frames
+        # are loaded once for every view
+        self.config = dict(server_clock.config)
+        self.font_data = server_clock.font_data
+        self.scaled_fonts = server_clock.scaled_fonts
+        self.transition_tables = server_clock.transition_tables
+        self.apply_config()
+        self.current_font = key[2]
+        self.config_error = server_clock.config_error
+        self.sampler = server_clock.sampler
+        self.themes = server_clock.themes
+        self.attach(RecordingBackend(key[0], key[1]))
+
+    def init_theme_colors(self):
+        """Draw with theme roles as attributes; each client maps them to its own colors"""
+        self.theme_attrs = [{role: i for i, role in enumerate(Theme.ROLES, 1)}]
+        self.set_theme(0)
+
+
+class ServedClient:
+    """A --connect client, as seen by the server"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.view = None  # ViewClock it is shown
+        self.lines = 24
+        self.cols = 80
+        self.font = None
+        self.behind = False  # Frames were skipped; the next one is sent whole
+
+    def send_frame(self, data):
+        """Send one frame's changes, or the whole frame once a slow client catches up"""
+        transport = self.writer.transport
+        if transport.is_closing():
+            return
+        if transport.get_write_buffer_size() > ClockServer.MAX_BACKLOG:
+            # Diffs only apply on top of the previous frame, so once one is
+            # dropped the client needs a full frame
+            self.behind = True
+            return
+        if self.behind:
+            self.behind = False
+            data = encode_message({'frame': self.view.backend.replay()})
+        self.writer.write(data)
+
+
+class ClockServer:
+    """Tick, format and sample once, and send the frame changes to every --connect client"""
+
+    MAX_BACKLOG = 1 << 16  # Unsent bytes a client may have before frames are skipped
+    MAX_SIZE = 1000  # Largest screen size accepted from a client, either way
+
+    def __init__(self, clock, address):
+        self.clock = clock
+        self.address = address
+        # Clients at the same size and font share one view, so drawing costs
+        # the same however many are watching
+        self.views = {}  # (lines, cols, font) -> ViewClock
+        self.time_str = ""
+        self.listening = False  # Whether the socket is ours to remove on exit
+        self.handlers = set()  # Tasks serving connected clients
+
+    def run(self):
+        """Serve until interrupted"""
+        import asyncio
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            print(f"Cannot serve on {format_address(self.address)}: {e.strerror or e}")
+        finally:
+            if self.address[0] == 'unix' and self.listening:
+                try:
+                    os.unlink(self.address[1])
+                except OSError:
+                    pass
+
+    async def serve(self):
+        """Accept clients and run the clock"""
+        import asyncio
+        import signal
+        clock = self.clock
+        # Interrupts end the loop below, so clients are disconnected cleanly
+        # rather than having their tasks cancelled
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        clock.config_watcher = ConfigWatcher(clock.config_path)
+        if clock.show_info:
+            clock.start_sampler()
+        clock.time_source.tick()
+        self.time_str = clock.get_time_string()
+        
+        if self.address[0] == 'unix':
+            self.remove_stale_socket(self.address[1])
+            server = await asyncio.start_unix_server(self.handle_client, self.address[1])
+        else:
+            server = await asyncio.start_server(self.handle_client, self.address[1], self.address[2])
+        self.listening = True
+        print(f"Serving on {format_address(self.address)}", flush=True)
+        async with server:
+            while clock.running:
+                clock.update_power_state()
+                clock.time_source.tick()
+                if clock.check_config():
+                    self.rebuild_views()
+                self.time_str = clock.get_time_string()
+                
+                animating = False
+                for view in list(self.views.values()):
+                    self.render(view)
+                    animating = animating or view.is_transitioning
+                
+                # Timer-aware, like the interactive loop
+                clock.schedule_frame(animating)
+                try:
+                    await asyncio.wait_for(stop.wait(), max(0.0, clock.scheduler.remaining()))
+                    break
+                except asyncio.TimeoutError:
+                    pass
+            
+            for view in list(self.views.values()):
+                for client in view.clients:
+                    client.writer.close()
+            await asyncio.gather(*self.handlers)
+
+    @staticmethod
+    def remove_stale_socket(path):
+        """Remove a socket file left behind by a server that is gone"""
+        import socket
+        import stat
+        try:
+            if not stat.S_ISSOCK(os.stat(path).st_mode):
+                return
+        except OSError:
+            return
+        probe = socket.socket(socket.AF_UNIX)
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+        except OSError:
+            pass
+        finally:
+            probe.close()
+
+    def render(self, view):
+        """Draw a view's next frame and send its changes to the view's clients"""
+        if self.time_str == view.last_time and not view.is_transitioning:
+            return
+        view.low_power = self.clock.low_power
+        view.render_frame(self.time_str)
+        view.last_time = self.time_str
+        ops = view.backend.take()
+        if not ops:
+            return
+        # Encoded once, however many clients get it
+        data = encode_message({'frame': ops})
+        for client in view.clients:
+            client.send_frame(data)
+
+    def join(self, client):
+        """Show a client the view matching its size and font, sending it a full frame"""
+        self.leave(client)
+        key = (client.lines, client.cols, client.font)
+        view = self.views.get(key)
+        if view is None:
+            view = self.views[key] = ViewClock(self.clock, key)
+            view.render_frame(self.time_str)
+            view.last_time = self.time_str
+        view.clients.add(client)
+        client.view = view
+        client.behind = False
+        client.writer.write(encode_message({'frame': view.backend.replay()}))
+
+    def leave(self, client):
+        """Stop showing a client its view, dropping views nobody watches"""
+        view = client.view
+        if view is None:
+            return
+        view.clients.discard(client)
+        client.view = None
+        if not view.clients:
+            self.views.pop(view.key, None)
+
+    def rebuild_views(self):
+        """Redraw every view with the reloaded settings"""
+        clock = self.clock
+        if clock.show_info:
+            clock.start_sampler()  # Reloading may have stopped it
+        views = self.views
+        self.views = {}
+        for view in views.values():
+            for client in list(view.clients):
+                client.view = None
+                self.join(client)
+
+    def handle_message(self, client, message):
+        """Apply a client's size, font or repaint request"""
+        if not isinstance(message, dict):
+            raise ValueError("expected an object")
+        size = message.get('size')
+        font = message.get('font')
+        if size is not None:
+            lines, cols = size
+            if not (isinstance(lines, int) and isinstance(cols, int)
+                    and 0 < lines <= self.MAX_SIZE and 0 < cols <= self.MAX_SIZE):
+                raise ValueError(f"bad size {size!r}")
+            client.lines, client.cols = lines, cols
+        if font is not None:
+            client.font = font if font in TerminalClock.FONT_FILES else self.clock.current_font
+        if size is not None or font is not None or client.view is None:
+            if client.font is None:
+                client.font = self.clock.current_font
+            self.join(client)
+        elif message.get('repaint'):
+            client.writer.write(encode_message({'frame': client.view.backend.replay()}))
+
+    async def handle_client(self, reader, writer):
+        """Serve one client until it disconnects or sends something unreadable"""
+        import asyncio
+        import json
+        client = ServedClient(writer)
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.handle_message(client, json.loads(line))
+                await writer.drain()
+        except (ValueError, TypeError, ConnectionError):
+            pass  # Bad input, or the client went away
+        finally:
+            self.leave(client)
+            writer.close()
+            self.handlers.discard(task)
+
+
+class ClockClient:
+    """Show a --serve clock, drawing the frames it sends with curses"""
+
+    def __init__(self, clock, address):
+        self.clock = clock
+        self.address = address
+        self.writer = None
+        self.role_attrs = {}  # Theme role number, as the server draws with -> attribute
+
+    def run(self):
+        """Connect and show the clock until q, or until the server goes away"""
+        import asyncio
+        try:
+            asyncio.run(self.session())
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            if self.clock.stdscr is None:
+                print(f"Cannot connect to {format_address(self.address)}: {e.strerror or e}")
+
+    async def session(self):
+        """Send our size and font, then draw every frame that arrives"""
+        import asyncio
+        import json
+        import signal
+        if self.address[0] == 'unix':
+            reader, self.writer = await asyncio.open_unix_connection(self.address[1])
+        else:
+            reader, self.writer = await asyncio.open_connection(self.address[1], self.address[2])
+        
+        clock = self.clock
+        clock.init_curses()
+        self.update_role_attrs()
+        self.send(size=[clock.lines, clock.cols], font=clock.current_font)
+        loop = asyncio.get_running_loop()
+        loop.add_reader(sys.stdin.fileno(), self.on_input)
+        loop.add_signal_handler(signal.SIGWINCH, self.on_resize)
+        try:
+            while clock.running:
+                line = await reader.readline()
+                if not line:
+                    break
+                frame = json.loads(line).get('frame')
+                if frame is not None:
+                    self.draw(frame)
+        finally:
+            loop.remove_reader(sys.stdin.fileno())
+            loop.remove_signal_handler(signal.SIGWINCH)
+            self.writer.close()
+
+    def send(self, **message):
+        """Send a message to the server"""
+        if not self.writer.transport.is_closing():
+            self.writer.write(encode_message(message))
+
+    def update_role_attrs(self):
+        """Map the server's role numbers to the active theme's attributes"""
+        attrs = self.clock.theme_attrs[self.clock.theme_index]
+        self.role_attrs = {i: attrs[role] for i, role in enumerate(Theme.ROLES, 1)}
+
+    def draw(self, frame):
+        """Apply one frame of changes to the screen"""
+        backend = self.clock.backend
+        role_attrs = self.role_attrs
+        for op in frame:
+            if op is None:
+                backend.clear()
+            else:
+                y, x, text, role = op
+                backend.write(y, x, text, role_attrs.get(role, 0))
+        backend.flush()
+
+    def on_input(self):
+        """Handle keys: q quits, f changes font, c changes theme"""
+        clock = self.clock
+        keys = clock.read_keys()
+        if not keys and clock.input_hung_up():
+            # The terminal is gone; stdin would stay readable forever
+            keys = [ord('q')]
+        for key in keys:
+            if key == ord('q') or key == 27:
+                clock.running = False
+                self.writer.close()  # Ends the read loop
+            elif key == ord('f'):
+                font_list = list(clock.FONT_FILES)
+                current_idx = font_list.index(clock.current_font) if clock.current_font in font_list else 0
+                clock.current_font = font_list[(current_idx + 1) % len(font_list)]
+                self.send(font=clock.current_font)
+            elif key == ord('c'):
+                # Colors are ours alone; the server just resends the frame
+                clock.set_theme((clock.theme_index + 1) % len(clock.themes))
+                self.update_role_attrs()
+                self.send(repaint=True)
+
+    def on_resize(self):
+        """Resize curses and ask for a frame drawn at the new size"""
+        clock = self.clock
+        clock.handle_resize()
+        clock.lines, clock.cols = clock.backend.size()
+        self.send(size=[clock.lines, clock.cols])
+
 
 def main():
     clock = TerminalClock()
@@ -0,0 +1,77 @@
+import pytest
+
+import termclock
+
+
+def write(tmp_path, text):
+    path = tmp_path / 'termclock.conf'
+    path.write_text(text)
+    return str(path)
+
+
+def test_read_config_parses_typed_values(tmp_path):
+    path = write(tmp_path, "# comment\n\nfont=star\ndate=yes\ncpu_interval=0.5\nscale=auto\n")
+    values, errors = termclock.read_config(path)
+    assert errors == []
+    assert values == {'font': 'star', 'date': True, 'cpu_interval': 0.5, 'scale': 'auto'}
+
+
+def test_read_config_reports_each_error_with_its_line(tmp_path):
+    path = write(tmp_path, "font=block\nnonsense\ncolour=red\ndate=maybe\ncpu_interval=0.01\nformat=48h\n")
+    values, errors = termclock.read_config(path)
+    assert values == {'font': 'block'}
+    assert [error.lineno for error in errors] == [2, 3, 4, 5, 6]
+    assert [error.key for error in errors] == [None, 'colour', 'date', 'cpu_interval', 'format']
+    assert str(errors[2]).startswith(f"{path}:4: date:")
+
+
+def test_read_config_strips_quotes(tmp_path):
+    path = write(tmp_path, "color = \"#ff8800\"\ntheme='neon'\n")
+    values, errors = termclock.read_config(path)
+    assert errors == []
+    assert values == {'color': '#ff8800', 'theme': 'neon'}
+
+
+def test_unknown_zone_is_a_line_numbered_config_error(tmp_path):
+    path = write(tmp_path, "date=true\nzones=UTC,Mars/Base\n")
+    values, errors = termclock.read_config(path)
+    assert values == {'date': True}
+    assert len(errors) == 1
+    assert errors[0].lineno == 2
+    assert errors[0].key == 'zones'
+    assert 'Mars/Base' in str(errors[0])
+
+
+def test_zones_spec_tidies_the_list():
+    assert termclock.zones_spec(" UTC , ,GMT ") == "UTC,GMT"
+    assert termclock.zones_spec("") == ""
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('cpu', [('cpu', '')]),
+    ('CPU, cpu:3 ,net:eth0,disk:/data,cpu', [('cpu', ''), ('cpu', '3'), ('net', 'eth0'), ('disk', '/data')]),
+    ('ram,battery', [('ram', ''), ('battery', '')]),
+])
+def test_info_items(text, expected):
+    assert termclock.info_items(text) == expected
+
+
+@pytest.mark.parametrize('text', ['', 'gpu', 'ram:1', 'cpu:x', 'disk:data', ' , '])
+def test_info_items_rejects(text):
+    with pytest.raises(ValueError):
+        termclock.info_items(text)
+
+
+def test_info_spec_is_canonical():
+    assert termclock.info_spec(" NET:eth0 , cpu ") == "net:eth0,cpu"
+
+
+@pytest.mark.parametrize('text, expected', [('auto', 'auto'), (' 2 ', '2'), ('1.5', '1.5')])
+def test_scale_spec(text, expected):
+    assert termclock.scale_spec(text) == expected
+
+
+@pytest.mark.parametrize('text', ['0.5', '1.25', 'big'])
+def test_scale_spec_rejects(text):
+    with pytest.raises(ValueError):
+        termclock.scale_spec(text)
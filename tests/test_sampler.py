@@ -0,0 +1,232 @@
+import time
+
+import pytest
+
+import termclock
+
+STAT = """\
+cpu  {total}
+cpu0 {cpu0}
+cpu1 {cpu1}
+intr 12345 0 0
+ctxt 67890
+"""
+
+MEMINFO = """\
+MemTotal:        8000000 kB
+MemFree:         1000000 kB
+MemAvailable:    6000000 kB
+Buffers:          200000 kB
+Cached:          2000000 kB
+SwapCached:            0 kB
+Active:          3000000 kB
+Inactive:        2000000 kB
+Active(anon):     500000 kB
+"""
+
+NET_DEV = """\
+Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo:    1000      10    0    0    0     0          0         0     1000      10    0    0    0     0       0          0
+  eth0: 5000000    4000    0    0    0     0          0         0   250000    3000    0    0    0     0       0          0
+"""
+
+DISKSTATS = """\
+   7       0 loop0 10 0 80 0 0 0 0 0 0 0 0 0 0 0 0 0 0
+ 259       0 nvme0n1 100 0 2000 50 40 0 1000 30 0 70 80 0 0 0 0 0 0
+ 259       1 nvme0n1p1 90 0 1800 40 30 0 800 20 0 60 60 0 0 0 0 0 0
+ 259       2 nvme0n1p2 10 0 200 10 10 0 200 10 0 10 20 0 0 0 0 0 0
+"""
+
+MOUNTS = """\
+/dev/nvme0n1p2 / ext4 rw,relatime 0 0
+proc /proc proc rw,nosuid 0 0
+/dev/nvme0n1p1 /mnt/my\\040data ext4 rw 0 0
+tmpfs /run tmpfs rw 0 0
+"""
+
+
+def cpu_line(user, system, idle, iowait=0):
+    # user nice system idle iowait irq softirq steal guest guest_nice
+    return f"{user} 0 {system} {idle} {iowait} 0 0 0 0 0"
+
+
+@pytest.fixture
+def roots(tmp_path):
+    """A fake /proc and /sys with two cores, one disk, eth0 and a battery"""
+    proc = tmp_path / 'proc'
+    sysfs = tmp_path / 'sys'
+    (proc / 'net').mkdir(parents=True)
+    (proc / 'self').mkdir()
+    (proc / 'stat').write_text(STAT.format(total=cpu_line(200, 100, 700),
+                                           cpu0=cpu_line(100, 50, 350), cpu1=cpu_line(100, 50, 350)))
+    (proc / 'meminfo').write_text(MEMINFO)
+    (proc / 'net' / 'dev').write_text(NET_DEV)
+    (proc / 'diskstats').write_text(DISKSTATS)
+    (proc / 'self' / 'mounts').write_text(MOUNTS)
+    for name in ('loop0', 'nvme0n1'):
+        (sysfs / 'block' / name).mkdir(parents=True)
+    supplies = sysfs / 'class' / 'power_supply'
+    for name, attributes in {
+        'AC': {'type': 'Mains', 'online': '0'},
+        'BAT0': {'type': 'Battery', 'capacity': '57', 'status': 'Discharging'},
+        'hidpp_battery_0': {'type': 'Battery', 'scope': 'Device', 'capacity': '5', 'status': 'Discharging'},
+    }.items():
+        (supplies / name).mkdir(parents=True)
+        for attribute, value in attributes.items():
+            (supplies / name / attribute).write_text(value + '\n')
+    return proc, sysfs
+
+
+@pytest.fixture
+def stats(roots):
+    stats = termclock.ProcStats(str(roots[0]), str(roots[1]))
+    yield stats
+    stats.close()
+
+
+def test_cpu_percent_is_measured_between_calls(roots, stats):
+    proc = roots[0]
+    stats.cpu_percent(percpu=True)
+    stats.cpu_percent()
+    # cpu0: 60 busy of 100 ticks, cpu1: 10 of 100; idle and iowait are both idle
+    (proc / 'stat').write_text(STAT.format(total=cpu_line(250, 120, 820, 10),
+                                           cpu0=cpu_line(140, 70, 390), cpu1=cpu_line(110, 50, 430, 10)))
+    assert stats.cpu_percent(percpu=True) == [60.0, 10.0]
+    assert stats.cpu_percent() == 35.0
+
+
+def test_first_cpu_percent_covers_time_since_boot(stats):
+    assert stats.cpu_percent(percpu=True) == [30.0, 30.0]
+
+
+def test_virtual_memory(stats):
+    memory = stats.virtual_memory()
+    assert memory.total == 8000000 * 1024
+    assert memory.available == 6000000 * 1024
+    assert memory.percent == 25.0
+
+
+def test_virtual_memory_without_mem_available(roots, stats):
+    # Kernels before 3.14 leave it out
+    roots[0].joinpath('meminfo').write_text(
+        MEMINFO.replace("MemAvailable:    6000000 kB\n", ""))
+    assert stats.virtual_memory().available == (1000000 + 200000 + 2000000) * 1024
+
+
+def test_net_io_counters(stats):
+    assert stats.net_io_counters(pernic=True)['eth0'] == (250000, 5000000)
+    assert stats.net_io_counters() == (251000, 5001000)
+
+
+def test_disk_io_counters_count_whole_disks_once(stats):
+    per_disk = stats.disk_io_counters(perdisk=True)
+    assert per_disk['nvme0n1p1'] == (1800 * 512, 800 * 512)
+    # The partitions' traffic is already in nvme0n1
+    assert stats.disk_io_counters() == ((80 + 2000) * 512, 1000 * 512)
+
+
+def test_disk_partitions_unescapes_mount_points(stats):
+    partitions = stats.disk_partitions()
+    assert [(part.device, part.mountpoint) for part in partitions] == [
+        ('/dev/nvme0n1p2', '/'), ('/dev/nvme0n1p1', '/mnt/my data')]
+    assert len(stats.disk_partitions(all=True)) == 4
+
+
+def test_sensors_battery_skips_peripherals(roots, stats):
+    assert stats.sensors_battery() == (57.0, False)
+    roots[1].joinpath('class', 'power_supply', 'AC', 'online').write_text('1\n')
+    assert stats.sensors_battery() == (57.0, True)
+
+
+def test_files_are_reread_in_place(roots, stats):
+    stats.net_io_counters()
+    descriptors = dict(stats._fds)
+    roots[0].joinpath('net', 'dev').write_text(NET_DEV.replace('5000000', '6000000'))
+    assert stats.net_io_counters(pernic=True)['eth0'].bytes_recv == 6000000
+    assert stats._fds == descriptors
+
+
+def test_missing_proc_raises_oserror(tmp_path):
+    with pytest.raises(OSError):
+        termclock.ProcStats(str(tmp_path / 'nowhere'), str(tmp_path))
+
+
+class FakeStats:
+    """Counter source whose battery read fails on demand and whose disks report no size"""
+
+    DiskUsage = termclock.ProcStats.DiskUsage
+
+    def __init__(self):
+        self.battery_error = None
+
+    def cpu_percent(self, interval=None, percpu=False):
+        return [10.0, 30.0] if percpu else 20.0
+
+    def virtual_memory(self):
+        return termclock.ProcStats.MemoryUsage(100, 50, 50.0)
+
+    def disk_usage(self, path):
+        return self.DiskUsage(0, 0, 0, 0.0)
+
+    def sensors_battery(self):
+        if self.battery_error:
+            raise OSError(self.battery_error)
+        return termclock.ProcStats.Battery(80.0, True)
+
+
+def test_disk_with_no_size_reads_zero():
+    sampler = termclock.SystemSampler(items='disk,disk:/proc')
+    sampler._stats = FakeStats()
+    assert sampler._sample('disk', 0.0) == {'disk': {'disk': 0, 'disk:/proc': 0}}
+
+
+def wait_for(condition, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < end, "timed out"
+        time.sleep(0.01)
+
+
+def test_a_failed_metric_only_marks_its_own_row(monkeypatch):
+    fake = FakeStats()
+    fake.battery_error = 'ACPI hiccup'
+    monkeypatch.setattr(termclock, 'system_stats', lambda: fake)
+    sampler = termclock.SystemSampler({'battery': 0.05}, items='cpu,ram,battery')
+    clock = termclock.TerminalClock()
+    clock.sampler = sampler
+    sampler.start()
+    try:
+        wait_for(lambda: 'battery' in sampler.snapshot().errors and sampler.snapshot().ram is not None)
+        rows = [text for text, _ in clock.get_system_info()]
+        assert rows[0].startswith('CPU') and 'Error' not in rows[0]
+        assert rows[2].startswith('RAM') and 'Error' not in rows[2]
+        assert rows[3] == 'Battery: Error (ACPI hiccup)'[:termclock.Layout.INFO_WIDTH]
+
+        # The next good sample clears it
+        fake.battery_error = None
+        wait_for(lambda: not sampler.snapshot().errors)
+        assert clock.get_system_info()[-1] == ('Battery: 80% (Charging)', '')
+    finally:
+        sampler.stop()
+
+
+class StaticSampler:
+    def __init__(self, battery):
+        self._snapshot = termclock.SystemSnapshot(*[None] * len(termclock.SystemSnapshot._fields))._replace(
+            battery=battery)
+
+    def snapshot(self):
+        return self._snapshot
+
+
+@pytest.mark.parametrize('battery, expected', [
+    ((50, False), True),
+    ((50, True), False),
+    ((50, None), False),  # Unknown plug state
+    (None, False),
+])
+def test_on_battery(battery, expected):
+    clock = termclock.TerminalClock()
+    clock.sampler = StaticSampler(battery)
+    assert clock.on_battery() is expected
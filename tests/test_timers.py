@@ -0,0 +1,36 @@
+import pytest
+
+import termclock
+
+SECOND = 1000000000
+
+
+@pytest.mark.parametrize('text, seconds', [
+    ('90', 90),
+    ('45s', 45),
+    ('25m', 25 * 60),
+    ('1h30m', 90 * 60),
+    ('1h', 3600),
+    ('2m30s', 150),
+    ('1.5m', 90),
+    ('1:30', 90),
+    ('1:30:00', 5400),
+    (' 10S ', 10),
+])
+def test_parse_duration(text, seconds):
+    assert termclock.parse_duration(text) == seconds * SECOND
+
+
+@pytest.mark.parametrize('text', ['', 'abc', '1x', '1:2:3:4', '0', '-5', '100h', 'm', 's1'])
+def test_parse_duration_rejects(text):
+    with pytest.raises(ValueError):
+        termclock.parse_duration(text)
+
+
+def test_timer_spec():
+    assert termclock.timer_spec('tea=3m') == ('tea', 180 * SECOND)
+    assert termclock.timer_spec(' lap ') == ('lap', None)
+    with pytest.raises(ValueError):
+        termclock.timer_spec('=5m')
+    with pytest.raises(ValueError):
+        termclock.timer_spec('tea=soon')
@@ -0,0 +1,55 @@
+import pytest
+
+import termclock
+
+
+def interpolate_digits(old_rep, new_rep, progress):
+    """The fade blend termclock drew every frame before the transition tables"""
+    result = []
+    for old_line, new_line in zip(old_rep, new_rep):
+        interpolated_line = ""
+        for j in range(len(old_line)):
+            if progress < 0.5 and old_line[j] != ' ':
+                interpolated_line += old_line[j]
+            elif progress >= 0.5 and new_line[j] != ' ':
+                interpolated_line += new_line[j]
+            elif progress > 0.3 and new_line[j] != ' ':
+                interpolated_line += new_line[j]
+            else:
+                interpolated_line += old_line[j]
+        result.append(interpolated_line)
+    return result
+
+
+@pytest.fixture(scope='module')
+def clock():
+    return termclock.TerminalClock()
+
+
+@pytest.mark.parametrize('font', list(termclock.TerminalClock.FONT_FILES))
+def test_fade_matches_interpolate_digits(clock, font):
+    atlas = clock.get_font(font)
+    table = termclock.TransitionTable(atlas, 'fade')
+    chars = termclock.GlyphAtlas.REQUIRED_CHARS
+    for old in chars:
+        for new in chars:
+            for step in range(table.STEPS):
+                progress = step / table.STEPS
+                assert list(table.frame(old, new, progress)) == interpolate_digits(
+                    atlas.glyph(old), atlas.glyph(new), progress), (old, new, progress)
+
+
+@pytest.mark.parametrize('style', list(termclock.TRANSITION_STYLES))
+def test_transitions_start_on_the_old_glyph(clock, style):
+    atlas = clock.get_font('block')
+    table = termclock.TransitionTable(atlas, style)
+    for old, new in [('1', '2'), ('9', '0'), ('5', ':')]:
+        assert table.frame(old, new, 0.0) == atlas.glyph(old)
+        # Progress past the last step holds on it rather than running off the table
+        assert table.frame(old, new, 1.0) == table.frame(old, new, 0.9)
+
+
+def test_characters_outside_the_table_are_blended_directly(clock):
+    atlas = clock.get_font('block')
+    table = termclock.TransitionTable(atlas, 'fade')
+    assert list(table.frame('A', '1', 0.6)) == interpolate_digits(atlas.glyph('A'), atlas.glyph('1'), 0.6)
@@ -0,0 +1,31 @@
+import pytest
+
+import termclock
+
+
+@pytest.fixture
+def clock_font():
+    """The block font's glyph atlas"""
+    return termclock.TerminalClock().get_font('block')
+
+
+def test_no_room_reserves_nothing(clock_font):
+    world = termclock.WorldClock(['UTC', 'UTC', 'UTC'])
+    assert world.plan(6, 80, clock_font, True, 5) == 0
+    assert world.positions == []
+
+
+def test_compact_rows_only_place_the_zones_that_fit(clock_font):
+    world = termclock.WorldClock(['UTC'] * 5)
+    # Two rows below the main clock, one of them the gap: a single row of two zones
+    assert world.plan(7, 80, clock_font, True, 5) == 2
+    assert not world.tiled
+    assert world.positions == [(0, 2), (0, 40)]
+
+
+def test_tiles_when_there_is_room(clock_font):
+    world = termclock.WorldClock(['UTC', 'UTC'])
+    reserved = world.plan(60, 200, clock_font, True, 10)
+    assert world.tiled
+    assert reserved == clock_font.height + 3
+    assert len(world.positions) == 2